@@ -0,0 +1,19 @@
+"""
+Benchmarks for Date Factory Manager
+Seeded synthetic datasets and timed endpoint scenarios run through the Flask
+test client against a throwaway SQLite database
+"""
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+def use_database(db_path):
+    """
+    Point the application at a benchmark database
+    Must be called before any module from src/ is imported, because config
+    reads DATABASE_PATH at import time
+    """
+    os.environ['DATABASE_PATH'] = os.path.abspath(db_path)
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,151 @@
+"""
+Seeded synthetic dataset generator
+Fills the configured SQLite database with customers, daily prices and
+weighbridge, crates and finance rows spread over a date season (Aug-Dec)
+
+Usage: python -m benchmarks.dataset <db_path> [--customers N] [--weighbridge N] ...
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+FIRST_NAMES = ['محمد', 'أحمد', 'محمود', 'علي', 'حسن', 'حسين', 'مصطفى', 'إبراهيم', 'عبد الله', 'خالد',
+               'عمر', 'يوسف', 'سعيد', 'عبد الرحمن', 'طارق', 'رمضان', 'سيد', 'جمال', 'صلاح', 'فتحي']
+FAMILY_NAMES = ['السيد', 'عبد العزيز', 'الشافعي', 'المصري', 'حسانين', 'عبد الحميد', 'النجار', 'الصعيدي',
+                'البحيري', 'عوض', 'سليمان', 'منصور', 'عثمان', 'الفيومي', 'الدسوقي', 'شحاتة']
+HANDLERS = ['عم سعيد', 'رمضان', 'محمود السائق', 'أبو علي', '']
+
+SEASON_START = (8, 1)
+SEASON_END = (12, 31)
+
+def season_dates(year):
+    """Every date of the season for a year"""
+    start = datetime(year, *SEASON_START)
+    days = (datetime(year, *SEASON_END) - start).days + 1
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+
+def _season_day(rng, days):
+    """Pick a season day index with activity peaking in late September"""
+    return min(days - 1, int(rng.triangular(0, days, days * 0.35)))
+
+def _customer_name(rng, index):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(FAMILY_NAMES)} {index}'
+
+def generate(customers=200, weighbridge=5000, crates=2000, finance=2000, seed=42, year=None):
+    """
+    Fill the configured database with a reproducible synthetic dataset
+
+    Returns: dict with the number of rows written per table
+    """
+    from database import get_connection, init_db, add_sample_data
+    import price_calendar
+
+    rng = random.Random(seed)
+    year = year or datetime.now().year
+    dates = season_dates(year)
+
+    init_db()
+    add_sample_data()
+
+    # Daily prices follow a random walk that rises toward the end of the season
+    prices = []
+    price = 140.0
+    for date in dates:
+        price = max(80.0, price + rng.gauss(0.15, 2.5))
+        prices.append((date, round(price, 2), 100.0))
+
+    # Traders are few but account for most of the volume
+    customer_rows = []
+    for i in range(1, customers + 1):
+        customer_type = 'تاجر' if rng.random() < 0.2 else 'عميل عادي'
+        phone = f'01{rng.choice("0125")}{rng.randint(10000000, 99999999)}' if rng.random() < 0.8 else ''
+        customer_rows.append((_customer_name(rng, i), customer_type, phone))
+    weights = [(5.0 if row[1] == 'تاجر' else 1.0) / (rank + 1) ** 0.6
+               for rank, row in enumerate(customer_rows)]
+
+    conn = get_connection()
+    try:
+        conn.executemany('INSERT OR REPLACE INTO daily_prices (date, price_per_qantar, qantar_weight) VALUES (?, ?, ?)',
+                         prices)
+        conn.executemany('INSERT INTO customers (name, type, phone) VALUES (?, ?, ?)', customer_rows)
+        customer_ids = [row['id'] for row in conn.execute('SELECT id FROM customers ORDER BY id').fetchall()]
+        customer_ids = customer_ids[-customers:] if customers else []
+
+        cum_weights = list(accumulate(weights))
+
+        def pick_customer():
+            return rng.choices(customer_ids, cum_weights=cum_weights)[0]
+
+        weighbridge_rows = []
+        for _ in range(weighbridge if customer_ids else 0):
+            day = _season_day(rng, len(dates))
+            date, day_price, qantar_weight = prices[day]
+            net_weight = round(min(30000.0, rng.lognormvariate(7.3, 0.7)), 1)
+            price_per_qantar = round(day_price + rng.choice((0, 0, 0, -5, 5, 10)), 2)
+            total = (net_weight / qantar_weight) * price_per_qantar
+            weighbridge_rows.append((date, pick_customer(), net_weight, price_per_qantar, total))
+        conn.executemany('''
+            INSERT INTO weighbridge (date, customer_id, net_weight, price_per_qantar, total)
+            VALUES (?, ?, ?, ?, ?)
+        ''', weighbridge_rows)
+
+        crate_rows = []
+        for _ in range(crates if customer_ids else 0):
+            date = dates[_season_day(rng, len(dates))]
+            crates_out = rng.randint(5, 200) if rng.random() < 0.6 else 0
+            crates_returned = rng.randint(0, 150) if crates_out == 0 else rng.randint(0, crates_out // 2)
+            crate_rows.append((date, pick_customer(), crates_out, crates_returned, rng.choice(HANDLERS), ''))
+        conn.executemany('''
+            INSERT INTO crates (date, customer_id, crates_out, crates_returned, handler, notes)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', crate_rows)
+
+        finance_rows = []
+        for _ in range(finance if customer_ids else 0):
+            date = dates[_season_day(rng, len(dates))]
+            amount = round(rng.lognormvariate(8.5, 1.0), -1)
+            if rng.random() < 0.75:
+                finance_rows.append((date, pick_customer(), 'دفع', amount, 0, 'دفعة تحت الحساب'))
+            else:
+                finance_rows.append((date, pick_customer(), 'قبض', 0, amount, ''))
+        conn.executemany('''
+            INSERT INTO finance (date, customer_id, transaction_type, amount_paid, amount_received, notes)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', finance_rows)
+
+        conn.commit()
+    finally:
+        conn.close()
+
+    price_calendar.invalidate()
+    return {
+        'customers': len(customer_rows),
+        'daily_prices': len(prices),
+        'weighbridge': len(weighbridge_rows),
+        'crates': len(crate_rows),
+        'finance': len(finance_rows),
+        'season': [dates[0], dates[-1]]
+    }
+
+def add_arguments(parser):
+    """Dataset size options shared by the benchmark tools"""
+    parser.add_argument('--customers', type=int, default=200)
+    parser.add_argument('--weighbridge', type=int, default=5000)
+    parser.add_argument('--crates', type=int, default=2000)
+    parser.add_argument('--finance', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--year', type=int, default=None)
+
+if __name__ == '__main__':
+    import json
+    from benchmarks import use_database
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic Date Factory Manager database')
+    parser.add_argument('db_path')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    use_database(args.db_path)
+    counts = generate(args.customers, args.weighbridge, args.crates, args.finance, args.seed, args.year)
+    print(json.dumps(counts, ensure_ascii=False, indent=2))
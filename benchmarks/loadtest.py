@@ -0,0 +1,235 @@
+"""
+Concurrent multi-clerk load test
+Drives a running server with virtual users that mix weighbridge writes,
+dashboard lookups and reports while one user exports periodically, and
+reports throughput, latency percentiles and "database is locked" error rates
+
+Usage: python -m benchmarks.loadtest --base-url http://localhost:5000 --users 8 --duration 60
+"""
+import argparse
+import http.cookiejar
+import json
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+from benchmarks.run import percentile
+
+LOCKED_MARKER = 'database is locked'
+
+DEFAULT_MIX = {'add_weighbridge': 4, 'dashboard': 3, 'reports': 2}
+
+
+class Client:
+    """Cookie-keeping HTTP client logged in as one virtual user"""
+
+    def __init__(self, base_url, username, password, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        status, body = self.request('POST', '/login', form={'username': username, 'password': password})
+        if status >= 400 or 'login' in self.last_url:
+            raise RuntimeError(f'Login failed for {username} (status {status})')
+
+    def request(self, method, path, json_body=None, form=None):
+        """Send a request and return (status, body text); network errors give status 0"""
+        data = None
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            data = urllib.parse.urlencode(form).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                self.last_url = response.geturl()
+                return response.status, response.read().decode('utf-8', errors='replace')
+        except urllib.error.HTTPError as e:
+            self.last_url = e.geturl() or path
+            return e.code, e.read().decode('utf-8', errors='replace')
+        except (urllib.error.URLError, OSError) as e:
+            self.last_url = path
+            return 0, str(e)
+
+
+class Recorder:
+    """Thread-safe collection of per-operation results"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.results = {}
+
+    def add(self, operation, elapsed, status, body):
+        locked = LOCKED_MARKER in body
+        with self.lock:
+            entry = self.results.setdefault(operation, {'durations': [], 'errors': 0, 'locked': 0, 'statuses': {}})
+            entry['durations'].append(elapsed)
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            if status == 0 or status >= 400:
+                entry['errors'] += 1
+            if locked:
+                entry['locked'] += 1
+
+    def summary(self, wall_seconds):
+        with self.lock:
+            results = {name: dict(entry, durations=list(entry['durations'])) for name, entry in self.results.items()}
+
+        operations = {}
+        total_requests = total_errors = total_locked = 0
+        for name, entry in sorted(results.items()):
+            count = len(entry['durations'])
+            total_requests += count
+            total_errors += entry['errors']
+            total_locked += entry['locked']
+            operations[name] = {
+                'requests': count,
+                'throughput_rps': round(count / wall_seconds, 2),
+                'p50_ms': round(percentile(entry['durations'], 50) * 1000, 2),
+                'p95_ms': round(percentile(entry['durations'], 95) * 1000, 2),
+                'p99_ms': round(percentile(entry['durations'], 99) * 1000, 2),
+                'max_ms': round(max(entry['durations']) * 1000, 2) if count else 0.0,
+                'errors': entry['errors'],
+                'error_rate': round(entry['errors'] / count, 4) if count else 0.0,
+                'locked': entry['locked'],
+                'locked_rate': round(entry['locked'] / count, 4) if count else 0.0,
+                'statuses': {str(k): v for k, v in entry['statuses'].items()}
+            }
+        return {
+            'requests': total_requests,
+            'throughput_rps': round(total_requests / wall_seconds, 2),
+            'errors': total_errors,
+            'error_rate': round(total_errors / total_requests, 4) if total_requests else 0.0,
+            'locked': total_locked,
+            'locked_rate': round(total_locked / total_requests, 4) if total_requests else 0.0,
+            'operations': operations
+        }
+
+
+def timed(recorder, operation, func):
+    started = time.perf_counter()
+    status, body = func()
+    recorder.add(operation, time.perf_counter() - started, status, body)
+
+def virtual_user(args, customer_ids, recorder, stop, seed):
+    """One clerk: log in, then pick operations from the mix until stopped"""
+    rng = random.Random(seed)
+    client = Client(args.base_url, args.username, args.password, args.timeout)
+    operations = list(args.mix)
+    weights = [args.mix[name] for name in operations]
+    today = datetime.now()
+
+    def add_weighbridge():
+        return client.request('POST', '/api/weighbridge', json_body={
+            'date': today.strftime('%Y-%m-%d'),
+            'customer_id': rng.choice(customer_ids),
+            'net_weight': round(rng.uniform(200, 5000), 1),
+            'price_per_qantar': rng.choice((140, 150, 160))
+        })
+
+    def dashboard():
+        return client.request('GET', f'/api/dashboard/{rng.choice(customer_ids)}')
+
+    def reports():
+        days = rng.choice((1, 7, 30, 150))
+        start = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+        customer = rng.choice(customer_ids) if rng.random() < 0.5 else ''
+        return client.request('GET', f'/api/reports?start={start}&end={today.strftime("%Y-%m-%d")}&customer={customer}')
+
+    actions = {'add_weighbridge': add_weighbridge, 'dashboard': dashboard, 'reports': reports}
+    while not stop.is_set():
+        operation = rng.choices(operations, weights)[0]
+        timed(recorder, operation, actions[operation])
+        if args.think_time:
+            stop.wait(rng.uniform(0, 2 * args.think_time))
+
+def exporter(args, recorder, stop):
+    """Owner's PC: run a full export every export_interval seconds"""
+    client = Client(args.base_url, args.username, args.password, args.timeout)
+    while not stop.wait(args.export_interval):
+        timed(recorder, 'export', lambda: client.request('GET', '/export'))
+
+def parse_mix(text):
+    """Parse 'add_weighbridge=4,dashboard=3,reports=2' into weights"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f'Unknown operation: {name}')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+def run(args):
+    setup = Client(args.base_url, args.username, args.password, args.timeout)
+    status, body = setup.request('GET', '/api/customers')
+    if status != 200:
+        raise RuntimeError(f'Could not list customers (status {status})')
+    customer_ids = [c['id'] for c in json.loads(body)]
+    if not customer_ids:
+        raise RuntimeError('The server has no customers; seed it with python -m benchmarks.dataset first')
+
+    recorder = Recorder()
+    stop = threading.Event()
+    threads = [threading.Thread(target=virtual_user, args=(args, customer_ids, recorder, stop, args.seed + i),
+                                name=f'clerk-{i}', daemon=True)
+               for i in range(args.users)]
+    if args.export_interval > 0:
+        threads.append(threading.Thread(target=exporter, args=(args, recorder, stop), name='exporter', daemon=True))
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=args.timeout)
+    wall_seconds = time.perf_counter() - started
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'label': args.label,
+            'base_url': args.base_url,
+            'users': args.users,
+            'duration_s': round(wall_seconds, 2),
+            'mix': args.mix,
+            'export_interval_s': args.export_interval,
+            'think_time_s': args.think_time
+        },
+        'results': recorder.summary(wall_seconds)
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent load test for a running Date Factory Manager server')
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--users', type=int, default=6, help='Concurrent virtual clerks')
+    parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+    parser.add_argument('--mix', type=parse_mix, default=dict(DEFAULT_MIX),
+                        help='Operation weights, e.g. add_weighbridge=4,dashboard=3,reports=2')
+    parser.add_argument('--export-interval', type=float, default=15, help='Seconds between exports (0 disables)')
+    parser.add_argument('--think-time', type=float, default=0.0, help='Mean pause between a clerk\'s requests')
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='', help='Free text describing the server configuration under test')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Endpoint benchmark suite
+Generates a seeded dataset in a temporary database, then runs timed scenarios
+through the Flask test client and reports p50/p95/p99 latency and rows per
+second as JSON
+
+Usage: python -m benchmarks.run [--iterations N] [--output results.json] [dataset options]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+from benchmarks import use_database
+from benchmarks import dataset
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize(durations, rows):
+    """Latency percentiles and throughput for one scenario"""
+    p50 = percentile(durations, 50)
+    return {
+        'iterations': len(durations),
+        'p50_ms': round(p50 * 1000, 2),
+        'p95_ms': round(percentile(durations, 95) * 1000, 2),
+        'p99_ms': round(percentile(durations, 99) * 1000, 2),
+        'mean_ms': round(sum(durations) / len(durations) * 1000, 2) if durations else 0.0,
+        'rows': rows,
+        'rows_per_sec': round(rows / p50, 1) if p50 and rows else None
+    }
+
+
+class BenchmarkApp:
+    """Logged-in test client for the application under benchmark"""
+
+    def __init__(self, work_dir):
+        import license_manager
+        from config import config
+
+        # Verify a real signed key for this machine without touching the saved license
+        license_key = license_manager.generate_license_key(license_manager.get_machine_id(), 'Benchmark')
+        license_manager.load_license = lambda: license_key
+
+        config.EXPORTS_DIR = os.path.join(work_dir, 'exports')
+        config.BACKUPS_DIR = os.path.join(work_dir, 'backups')
+        os.makedirs(config.EXPORTS_DIR, exist_ok=True)
+        os.makedirs(config.BACKUPS_DIR, exist_ok=True)
+
+        import app as app_module
+        self.module = app_module
+        self.client = app_module.app.test_client()
+        response = self.client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+        if response.status_code != 302:
+            raise RuntimeError(f'Login failed with status {response.status_code}')
+
+    def close(self):
+        self.module.scheduler.shutdown(wait=False)
+
+    def request(self, method, url, **kwargs):
+        response = self.client.open(url, method=method, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method} {url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+        return response
+
+
+def table_count(table):
+    from database import get_connection
+    conn = get_connection()
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    finally:
+        conn.close()
+
+def build_scenarios(bench, season, top_customer):
+    """
+    Scenarios as (name, function) pairs; each function runs one request and
+    returns the number of rows it processed
+    """
+    start, end = season
+    season_start = datetime.strptime(start, '%Y-%m-%d')
+    week_end = (season_start + timedelta(days=6)).strftime('%Y-%m-%d')
+    month_end = (season_start + timedelta(days=30)).strftime('%Y-%m-%d')
+    counts = {table: table_count(table) for table in ('customers', 'weighbridge', 'crates', 'finance')}
+
+    def page(url, table):
+        rows = min(100, counts[table]) if table else 0
+        def run():
+            bench.request('GET', url)
+            return rows
+        return run
+
+    def json_rows(url):
+        def run():
+            data = bench.request('GET', url).get_json()
+            if isinstance(data, list):
+                return len(data)
+            return sum(len(data.get(key) or []) for key in ('weighbridge', 'finance', 'crates', 'customers'))
+        return run
+
+    def json_totals(url):
+        # A flat object of totals counts as one row
+        def run():
+            bench.request('GET', url).get_json()
+            return 1
+        return run
+
+    def export():
+        response = bench.request('GET', '/export')
+        response.get_data()
+        response.close()
+        return sum(counts.values())
+
+    return [
+        ('dashboard_page', page('/dashboard', None)),
+        ('api_customers', json_rows('/api/customers')),
+        ('api_dashboard', json_totals(f'/api/dashboard/{top_customer}')),
+        ('customer_balances_top', json_rows('/api/customers/balances?top=10')),
+        ('customers_page', page('/customers', 'customers')),
+        ('weighbridge_page', page('/weighbridge', 'weighbridge')),
+        ('crates_page', page('/crates', 'crates')),
+        ('finance_page', page('/finance', 'finance')),
+        ('settings_prices', json_rows('/api/settings/prices')),
+        ('reports_week', json_rows(f'/api/reports?start={start}&end={week_end}')),
+        ('reports_month', json_rows(f'/api/reports?start={start}&end={month_end}')),
+        ('reports_season', json_rows(f'/api/reports?start={start}&end={end}')),
+        ('reports_season_customer', json_rows(f'/api/reports?start={start}&end={end}&customer={top_customer}')),
+        ('export', export),
+    ]
+
+def run_import_scenarios(bench, iterations, work_dir):
+    """Time /import in merge mode (import) and replace mode (restore) with an exported workbook"""
+    from export import export_to_excel
+
+    workbook_path = export_to_excel(os.path.join(work_dir, 'benchmark_source.xlsx'))
+    with open(workbook_path, 'rb') as f:
+        workbook = f.read()
+
+    def upload(mode):
+        response = bench.request('POST', '/import', data={
+            'file': (io.BytesIO(workbook), 'benchmark.xlsx'),
+            'mode': mode
+        }, content_type='multipart/form-data')
+        stats = response.get_json()['stats']
+        return sum(stats[key]['added'] + stats[key]['skipped'] for key in stats)
+
+    results = {}
+    # Restore first (replace keeps the dataset the same size), then a single merge import
+    durations, rows = [], 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        rows = upload('replace')
+        durations.append(time.perf_counter() - started)
+    results['restore'] = summarize(durations, rows)
+
+    started = time.perf_counter()
+    rows = upload('merge')
+    results['import'] = summarize([time.perf_counter() - started], rows)
+    return results
+
+def run(args):
+    work_dir = tempfile.mkdtemp(prefix='dfm_bench_')
+    db_path = os.path.join(work_dir, 'benchmark.db')
+    use_database(db_path)
+
+    try:
+        counts = dataset.generate(args.customers, args.weighbridge, args.crates, args.finance, args.seed, args.year)
+        bench = BenchmarkApp(work_dir)
+
+        from database import get_connection
+        conn = get_connection()
+        top_customer = conn.execute('''
+            SELECT customer_id FROM weighbridge GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1
+        ''').fetchone()
+        conn.close()
+        top_customer = top_customer[0] if top_customer else 1
+
+        results = {}
+        try:
+            for name, scenario in build_scenarios(bench, counts['season'], top_customer):
+                if args.only and name not in args.only:
+                    continue
+                scenario()  # warm-up
+                durations, rows = [], 0
+                iterations = max(1, args.iterations // 5) if name == 'export' else args.iterations
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    rows = scenario()
+                    durations.append(time.perf_counter() - started)
+                results[name] = summarize(durations, rows)
+
+            if not args.only or {'import', 'restore'} & set(args.only):
+                results.update(run_import_scenarios(bench, max(1, args.iterations // 5), work_dir))
+        finally:
+            bench.close()
+
+        return {
+            'meta': {
+                'timestamp': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'seed': args.seed,
+                'iterations': args.iterations,
+                'dataset': counts
+            },
+            'scenarios': results
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark Date Factory Manager endpoints')
+    dataset.add_arguments(parser)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--only', nargs='*', help='Run only these scenarios')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the temporary database and exports')
+    args = parser.parse_args(argv)
+
+    # The application prints progress and debug lines; keep stdout for the report
+    with redirect_stdout(sys.stderr):
+        report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+if __name__ == '__main__':
+    sys.exit(main())
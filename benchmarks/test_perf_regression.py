@@ -0,0 +1,214 @@
+"""
+Performance regression suite
+Runs the hot paths at a fixed dataset size in a temporary database and fails
+when one is slower than its stored baseline by more than the tolerance
+
+Opt-in because timings depend on the machine:
+    DFM_PERF=1 python -m pytest benchmarks -q
+Record new baselines after an intended change:
+    DFM_PERF=1 DFM_UPDATE_BASELINES=1 python -m pytest benchmarks -q
+"""
+import json
+import os
+import sqlite3
+import statistics
+import time
+
+import pytest
+
+from benchmarks import use_database
+from benchmarks import dataset
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+TOLERANCE = float(os.environ.get('DFM_PERF_TOLERANCE', '1.5'))
+# Fast paths get an absolute allowance so timer noise cannot fail them
+SLACK_MS = float(os.environ.get('DFM_PERF_SLACK_MS', '5'))
+UPDATE_BASELINES = os.environ.get('DFM_UPDATE_BASELINES') == '1'
+
+DATASET = {'customers': 200, 'weighbridge': 5000, 'crates': 1000, 'finance': 1000, 'seed': 1234, 'year': 2025}
+IMPORT_CUSTOMERS = 500
+
+pytestmark = pytest.mark.skipif(os.environ.get('DFM_PERF') != '1', reason='set DFM_PERF=1 to run performance tests')
+
+
+def calibrate():
+    """Time a fixed Python + SQLite workload so baselines can be scaled to this machine"""
+    def workload():
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT, value REAL)')
+        conn.executemany('INSERT INTO t (name, value) VALUES (?, ?)',
+                         ((f'name {i % 97}', i * 0.5) for i in range(20000)))
+        conn.execute('SELECT name, SUM(value) FROM t GROUP BY name').fetchall()
+        rows = [dict(zip(('id', 'name', 'value'), r)) for r in conn.execute('SELECT * FROM t')]
+        json.dumps(rows)
+        conn.close()
+    return measure(workload, runs=5)
+
+def measure(func, runs, setup=None):
+    """Median wall time of func in milliseconds"""
+    durations = []
+    for _ in range(runs):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+def load_baselines():
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def top_customer():
+    from database import get_connection
+    conn = get_connection()
+    row = conn.execute('SELECT customer_id FROM weighbridge GROUP BY customer_id ORDER BY COUNT(*) DESC LIMIT 1').fetchone()
+    conn.close()
+    return row[0]
+
+
+@pytest.fixture(scope='module')
+def perf_env(tmp_path_factory):
+    """Seeded dataset in a temporary database, plus calibration and result collection"""
+    work_dir = tmp_path_factory.mktemp('perf')
+    db_path = str(work_dir / 'perf.db')
+    use_database(db_path)
+
+    import database
+    previous_db_path = database.DB_PATH
+    database.DB_PATH = db_path
+
+    dataset.generate(**DATASET)
+    baselines = load_baselines()
+    env = {
+        'work_dir': str(work_dir),
+        'baselines': baselines,
+        'calibration_ms': calibrate(),
+        'results': {}
+    }
+    yield env
+
+    database.DB_PATH = previous_db_path
+    if UPDATE_BASELINES:
+        baselines.update(env['results'])
+        baselines['_calibration_ms'] = round(env['calibration_ms'], 2)
+        baselines['_dataset'] = DATASET
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+def check(perf_env, name, elapsed_ms):
+    """Compare a measurement with its baseline scaled by machine speed"""
+    perf_env['results'][name] = round(elapsed_ms, 2)
+    baseline = perf_env['baselines'].get(name)
+    if UPDATE_BASELINES or baseline is None:
+        return
+
+    scale = perf_env['calibration_ms'] / perf_env['baselines'].get('_calibration_ms', perf_env['calibration_ms'])
+    allowed = max(baseline * scale * TOLERANCE, baseline * scale + SLACK_MS)
+    assert elapsed_ms <= allowed, (
+        f'{name} took {elapsed_ms:.1f} ms; baseline {baseline:.1f} ms x machine scale {scale:.2f} '
+        f'x tolerance {TOLERANCE} (min slack {SLACK_MS} ms) = {allowed:.1f} ms')
+
+@pytest.fixture(scope='module')
+def client(perf_env):
+    from benchmarks.run import BenchmarkApp
+    bench = BenchmarkApp(perf_env['work_dir'])
+    yield bench.client
+    bench.close()
+
+@pytest.fixture(scope='module')
+def exported_workbook(perf_env):
+    from export import export_to_excel
+    return export_to_excel(os.path.join(perf_env['work_dir'], 'perf_export.xlsx'))
+
+
+def test_export_to_excel(perf_env):
+    from export import export_to_excel
+    output = os.path.join(perf_env['work_dir'], 'export_run.xlsx')
+    check(perf_env, 'export_to_excel', measure(lambda: export_to_excel(output), runs=3))
+
+def test_restore_from_excel(perf_env, exported_workbook):
+    from restore_data import restore_from_excel
+
+    def restore():
+        stats = restore_from_excel(exported_workbook, 'replace')
+        assert 'error' not in stats
+        assert stats['weighbridge']['added'] == DATASET['weighbridge']
+
+    check(perf_env, 'restore_from_excel', measure(restore, runs=3))
+
+@pytest.mark.parametrize('name,days,single_customer', [
+    ('api_reports_month', 30, False),
+    ('api_reports_season', 153, False),
+    ('api_reports_season_customer', 153, True),
+])
+def test_api_reports(perf_env, client, name, days, single_customer):
+    from datetime import datetime, timedelta
+    import report_cache
+    start = datetime(DATASET['year'], 8, 1)
+    end = (start + timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    customer = top_customer() if single_customer else ''
+    url = f"/api/reports?start={start.strftime('%Y-%m-%d')}&end={end}&customer={customer}"
+
+    def report():
+        # Measure building the report, not the result cache
+        report_cache.clear()
+        response = client.get(url)
+        assert response.status_code == 200
+        response.get_data()
+
+    report()
+    check(perf_env, name, measure(report, runs=10))
+
+def test_api_dashboard(perf_env, client):
+    url = f'/api/dashboard/{top_customer()}'
+
+    def dashboard():
+        response = client.get(url)
+        assert response.status_code == 200
+
+    dashboard()
+    check(perf_env, 'api_dashboard', measure(dashboard, runs=30))
+
+def test_api_customer_balances_top(perf_env, client):
+    import report_cache
+
+    def balances():
+        # Measure the grouped query, not the result cache
+        report_cache.clear()
+        response = client.get('/api/customers/balances?top=10')
+        assert response.status_code == 200
+        assert len(response.get_json()['customers']) == 10
+
+    balances()
+    check(perf_env, 'api_customer_balances_top', measure(balances, runs=10))
+
+def test_import_customers_from_excel(perf_env):
+    import openpyxl
+    from bulk_import import import_customers_from_excel
+    from database import get_connection
+
+    path = os.path.join(perf_env['work_dir'], 'perf_customers.xlsx')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['اسم العميل', 'النوع', 'رقم الهاتف'])
+    for i in range(IMPORT_CUSTOMERS):
+        sheet.append([f'عميل اختبار الأداء {i}', 'عميل عادي', f'0100000{i:04d}'])
+    workbook.save(path)
+
+    def remove_imported():
+        conn = get_connection()
+        conn.execute("DELETE FROM customers WHERE name LIKE 'عميل اختبار الأداء %'")
+        conn.commit()
+        conn.close()
+
+    def run_import():
+        success_count, error_count, errors = import_customers_from_excel(path)
+        assert success_count == IMPORT_CUSTOMERS, errors[:3]
+
+    check(perf_env, 'import_customers_from_excel', measure(run_import, runs=3, setup=remove_imported))
+    remove_imported()
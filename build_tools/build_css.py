@@ -0,0 +1,94 @@
+"""
+Precompile the Tailwind stylesheet for Date Factory Manager
+Runs the Tailwind CLI over src/templates, writes a minified, content-hashed
+src/static/css/app.<hash>.css and records its name in src/static/manifest.json
+
+The CLI is taken from TAILWIND_CLI, a standalone `tailwindcss` binary on PATH,
+or `npx tailwindcss@3` (in that order).
+
+Usage:
+    python build_tools/build_css.py
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+TAILWIND_DIR = os.path.join(TOOLS_DIR, 'tailwind')
+STATIC_DIR = os.path.join(os.path.dirname(TOOLS_DIR), 'src', 'static')
+CSS_DIR = os.path.join(STATIC_DIR, 'css')
+MANIFEST_PATH = os.path.join(STATIC_DIR, 'manifest.json')
+
+HASHED_CSS = re.compile(r'^app\.[0-9a-f]{10}\.css$')
+
+def find_cli():
+    """Command line for the Tailwind CLI, or None"""
+    if os.environ.get('TAILWIND_CLI'):
+        return [os.environ['TAILWIND_CLI']]
+    standalone = shutil.which('tailwindcss')
+    if standalone:
+        return [standalone]
+    npx = shutil.which('npx')
+    if npx:
+        return [npx, '--yes', 'tailwindcss@3']
+    return None
+
+def build(cli):
+    """Compile the stylesheet and return its minified contents"""
+    output_fd, output_path = tempfile.mkstemp(suffix='.css')
+    os.close(output_fd)
+    try:
+        subprocess.run(cli + [
+            '--config', os.path.join(TAILWIND_DIR, 'tailwind.config.js'),
+            '--input', os.path.join(TAILWIND_DIR, 'input.css'),
+            '--output', output_path,
+            '--minify'
+        ], check=True)
+        with open(output_path, 'rb') as f:
+            return f.read()
+    finally:
+        os.remove(output_path)
+
+def write_hashed(css):
+    """Write css under a content-hashed name, drop older builds and update the manifest"""
+    name = f'app.{hashlib.sha256(css).hexdigest()[:10]}.css'
+    os.makedirs(CSS_DIR, exist_ok=True)
+    with open(os.path.join(CSS_DIR, name), 'wb') as f:
+        f.write(css)
+
+    for old in os.listdir(CSS_DIR):
+        if old != name and HASHED_CSS.match(old):
+            os.remove(os.path.join(CSS_DIR, old))
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'css/app.css': f'css/{name}'}, f, indent=2)
+    return name
+
+def main():
+    cli = find_cli()
+    if cli is None:
+        print('❌ Tailwind CLI not found. Install the standalone tailwindcss binary or Node.js, '
+              'or set TAILWIND_CLI', file=sys.stderr)
+        return 1
+
+    print('🎨 Compiling Tailwind stylesheet...')
+    try:
+        css = build(cli)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f'❌ Tailwind build failed: {e}', file=sys.stderr)
+        return 1
+    if not css.strip():
+        print('❌ Tailwind produced an empty stylesheet', file=sys.stderr)
+        return 1
+
+    name = write_hashed(css)
+    print(f'✅ src/static/css/{name} ({len(css) / 1024:.1f} KB)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
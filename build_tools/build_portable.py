@@ -21,6 +21,22 @@ def main():
         subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller==6.3.0"])
         print("✅ PyInstaller installed")
     
+    print()
+    print("⏱️  Checking startup time budget...")
+    budget = subprocess.run([sys.executable, "startup_report.py", "--check", "--top", "5"],
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if budget.returncode != 0:
+        print()
+        print("❌ Startup is over budget (see startup_budget.json)")
+        return False
+    
+    print()
+    css = subprocess.run([sys.executable, "build_css.py"], cwd=os.path.dirname(os.path.abspath(__file__)))
+    if css.returncode != 0:
+        print()
+        print("❌ Stylesheet build failed")
+        return False
+    
     print()
     print("📦 Building executable with PyInstaller...")
     print()
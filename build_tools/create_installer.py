@@ -6,6 +6,7 @@ This script automates the entire process of creating a Windows installer:
 3. Compiles installer with Inno Setup
 """
 
+import json
 import os
 import sys
 import subprocess
@@ -178,6 +179,34 @@ def check_dependencies():
     
     return True
 
+def check_startup_budget():
+    """Check startup time against startup_budget.json"""
+    print_step("Checking startup time budget...")
+    result = subprocess.run([sys.executable, "startup_report.py", "--check", "--top", "5"], capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if result.returncode != 0:
+        print_error("Startup is over budget (see startup_budget.json):")
+        print_error(result.stderr.strip())
+        return False
+    
+    report = json.loads(result.stdout)
+    if 'import_app_ms' in report:
+        print_info(f"import app: {report['import_app_ms']} ms")
+    print_info(f"First response: {report['first_response_ms']} ms")
+    print_success("Startup is within budget")
+    return True
+
+def build_stylesheet():
+    """Precompile the Tailwind stylesheet into src/static"""
+    print_step("Compiling Tailwind stylesheet...")
+    result = subprocess.run([sys.executable, "build_css.py"], capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if result.returncode != 0:
+        print_error(result.stderr.strip() or "Tailwind build failed")
+        return False
+    
+    print_info(result.stdout.strip().splitlines()[-1])
+    print_success("Stylesheet compiled")
+    return True
+
 def build_portable_app():
     """Build the portable application using PyInstaller"""
     print_step("Building portable application with PyInstaller...")
@@ -301,8 +330,10 @@ def main():
     print(f"{Colors.BOLD}This script will:{Colors.ENDC}")
     print("  1. Check/install Inno Setup")
     print("  2. Check Python dependencies")
-    print("  3. Build portable application")
-    print("  4. Compile Windows installer")
+    print("  3. Check startup time budget")
+    print("  4. Compile Tailwind stylesheet")
+    print("  5. Build portable application")
+    print("  6. Compile Windows installer")
     print()
     
     # Step 1: Check Inno Setup
@@ -316,12 +347,22 @@ def main():
         print_error("Failed to install required dependencies")
         return False
     
-    # Step 3: Build portable app
+    # Step 3: Check startup time of the source tree
+    if not check_startup_budget():
+        print_error("Fix the slow startup before building")
+        return False
+    
+    # Step 4: Precompile the stylesheet bundled from src/static
+    if not build_stylesheet():
+        print_error("Cannot build without the stylesheet")
+        return False
+    
+    # Step 5: Build portable app
     if not build_portable_app():
         print_error("Failed to build portable application")
         return False
     
-    # Step 4: Compile installer
+    # Step 6: Compile installer
     if not compile_installer(iscc_path):
         print_error("Failed to compile installer")
         return False
@@ -0,0 +1,172 @@
+"""
+Startup timing report for Date Factory Manager
+Measures how long `import app` takes (from `python -X importtime`) and the time
+from process start to the first 200 response, and checks them against
+startup_budget.json
+
+Usage:
+    python build_tools/startup_report.py                 # report for the source tree
+    python build_tools/startup_report.py --check         # exit 1 when over budget
+    python build_tools/startup_report.py --exe dist/DateFactoryPortable/DateFactoryPortable.exe --port 5000
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(os.path.dirname(TOOLS_DIR), 'src')
+BUDGET_PATH = os.path.join(TOOLS_DIR, 'startup_budget.json')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def isolated_env(work_dir):
+    """Environment that keeps the database, AppData and Documents in work_dir"""
+    env = dict(os.environ)
+    env['DATABASE_PATH'] = os.path.join(work_dir, 'date_factory.db')
+    env['APPDATA'] = work_dir
+    env['HOME'] = work_dir
+    env['USERPROFILE'] = work_dir
+    env['PYTHONIOENCODING'] = 'utf-8'
+    return env
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into (name, self_us, cumulative_us, depth) entries"""
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+def measure_imports(env, top):
+    """Import the app once to create the database, then time a second import"""
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=SRC_DIR, env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=SRC_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors='replace')
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'import app failed:\n{result.stderr[-2000:]}')
+
+    entries = parse_importtime(result.stderr)
+    app_entry = next((e for e in entries if e[0] == 'app'), None)
+    modules = {e[0] for e in entries}
+    return {
+        'import_app_ms': round(app_entry[2] / 1000, 1) if app_entry else None,
+        'process_ms': round(wall_ms, 1),
+        'modules': len(entries),
+        'loaded': modules,
+        'top_cumulative': [{'module': name, 'ms': round(cumulative / 1000, 1)}
+                           for name, _, cumulative, depth in sorted(entries, key=lambda e: -e[2])
+                           if depth <= 2][:top],
+        'top_self': [{'module': name, 'ms': round(self_us / 1000, 1)}
+                     for name, self_us, _, _ in sorted(entries, key=lambda e: -e[1])][:top]
+    }
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def measure_first_response(command, cwd, env, port, timeout):
+    """Start the server and time until GET / answers 200 (after redirects)"""
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f'Server exited with code {process.returncode} before answering')
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=2) as response:
+                    if response.status == 200:
+                        return round((time.perf_counter() - started) * 1000, 1)
+            except (urllib.error.URLError, OSError):
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f'No 200 response within {timeout} s')
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+def check_budget(report, budget, frozen):
+    """List of budget violations"""
+    failures = []
+    limits = [('first_response_ms', 'exe_first_response_ms' if frozen else 'first_response_ms')]
+    if not frozen:
+        limits.insert(0, ('import_app_ms', 'import_ms'))
+    for measured, limit in limits:
+        value = report.get(measured)
+        if limit in budget and value is not None and value > budget[limit]:
+            failures.append(f'{measured} {value} ms exceeds budget {budget[limit]} ms')
+    for module in report.get('eager_heavy_modules', []):
+        failures.append(f'{module} is imported at startup; import it on first use')
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report and check Date Factory Manager startup time')
+    parser.add_argument('--exe', help='Measure a built executable instead of the source tree')
+    parser.add_argument('--port', type=int, help='Port the server listens on (the executable uses 5000)')
+    parser.add_argument('--budget', default=BUDGET_PATH)
+    parser.add_argument('--check', action='store_true', help='Exit with status 1 when over budget')
+    parser.add_argument('--top', type=int, default=15, help='Number of slowest modules to list')
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args(argv)
+
+    with open(args.budget, encoding='utf-8') as f:
+        budget = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix='dfm_startup_')
+    try:
+        env = isolated_env(work_dir)
+        report = {}
+        if args.exe:
+            port = args.port or 5000
+            report['first_response_ms'] = measure_first_response(
+                [os.path.abspath(args.exe)], os.path.dirname(os.path.abspath(args.exe)), env, port, args.timeout)
+        else:
+            imports = measure_imports(env, args.top)
+            loaded = imports.pop('loaded')
+            report.update(imports)
+            report['eager_heavy_modules'] = [m for m in budget.get('lazy_modules', []) if m in loaded]
+
+            port = args.port or free_port()
+            server = (f"from app import app; app.run(host='127.0.0.1', port={port}, "
+                      f"debug=False, use_reloader=False)")
+            report['first_response_ms'] = measure_first_response(
+                [sys.executable, '-c', server], SRC_DIR, env, port, args.timeout)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    failures = check_budget(report, budget, frozen=bool(args.exe))
+    report['budget'] = budget
+    report['failures'] = failures
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    print(text)
+
+    if args.check and failures:
+        for failure in failures:
+            print(f'❌ {failure}', file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
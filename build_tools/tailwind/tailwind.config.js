@@ -0,0 +1,16 @@
+// Tailwind configuration for the precompiled stylesheet
+// Build with: python build_tools/build_css.py
+const path = require('path');
+
+module.exports = {
+  content: [path.join(__dirname, '..', '..', 'src', 'templates', '**', '*.html')],
+  darkMode: 'class',
+  theme: {
+    extend: {
+      colors: {
+        primary: '#2F75B5',
+        secondary: '#FFC000',
+      }
+    }
+  }
+}
@@ -1,15 +1,38 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-from database import get_connection, init_db
+import logging_setup
+logging_setup.setup_logging()
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, g, Response
+from database import get_connection, get_read_connection, init_db
 from datetime import datetime
+from functools import wraps
 import os
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import check_password_hash
 import license_manager
-from config import config
+import price_calendar
+import report_cache
+import report_queries
+import read_executor
+import profiler
+import query_log
+import metrics
+import memory_tracker
+import server_timing
+import assets
+import compression
+import etags
+import time
+from config import config, ensure_dir, ensure_exports_dir
 from security_utils import SecurityUtils
+import logging
+
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = config.SECRET_KEY
+server_timing.init_app(app)
+assets.init_app(app)
+compression.init_app(app)
 
 # Initialize Login Manager
 login_manager = LoginManager()
@@ -23,11 +46,22 @@ class User(UserMixin):
         self.username = username
         self.role = role
 
+def admin_required(view):
+    """Allow only logged-in admin users"""
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if getattr(current_user, 'role', None) != 'admin':
+            return jsonify({'success': False, 'message': 'غير مصرح لك بهذه العملية'}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
 @login_manager.user_loader
 def load_user(user_id):
-    conn = get_connection()
-    user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
-    conn.close()
+    with server_timing.measure('auth'):
+        conn = get_connection()
+        user = conn.execute('SELECT * FROM users WHERE id = ?', (user_id,)).fetchone()
+        conn.close()
     if user:
         return User(user['id'], user['username'], user['role'])
     return None
@@ -35,6 +69,7 @@ def load_user(user_id):
 # Initialize database on first run
 # Initialize database on first run
 if not os.path.exists(config.DATABASE_PATH):
+    ensure_dir(os.path.dirname(os.path.abspath(config.DATABASE_PATH)))
     init_db()
     from database import add_sample_data
     add_sample_data()
@@ -42,33 +77,96 @@ else:
     # Database exists, ensure admin user exists (for upgrades/reinstalls)
     try:
         conn = get_connection()
+        # Create tables and indexes added since this database was made
+        from database import missing_schema
+        if missing_schema(conn):
+            init_db()
         # Check if users table exists first (migration safety)
         table_check = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='users'").fetchone()
         if table_check:
             admin = conn.execute("SELECT id FROM users WHERE username='admin'").fetchone()
             if not admin:
-                print("Admin user missing. Creating default admin...")
+                logger.warning("Admin user missing. Creating default admin...")
                 from database import add_sample_data
                 add_sample_data()
         conn.close()
     except Exception as e:
-        print(f"Error checking admin user: {e}")
+        logger.error("Error checking admin user: %s", e)
 
 # Start backup scheduler
 from backup_scheduler import start_scheduler
 scheduler = start_scheduler()
+started_at = datetime.now()
+
+@app.before_request
+def start_request_metrics():
+    """Start timing the request and counting its SQL statements"""
+    g.request_started = time.perf_counter()
+    metrics.http_requests_in_flight.inc()
+    query_log.begin_request()
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Record latency, status and SQL totals for the finished request"""
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    metrics.http_requests_in_flight.dec()
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    status = 500 if error is not None else g.pop('response_status', 500)
+    db_count, db_ms = query_log.end_request()
+
+    metrics.http_requests_total.inc(endpoint=endpoint, method=request.method, status=status)
+    metrics.http_request_duration_seconds.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+    metrics.db_queries_per_request.observe(db_count, endpoint=endpoint)
+    metrics.db_seconds_per_request.observe(db_ms / 1000, endpoint=endpoint)
+
+@app.after_request
+def remember_response_status(response):
+    g.response_status = response.status_code
+    if config.SERVER_TIMING_ENABLED and 'request_started' in g:
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        db_count, db_ms = query_log.request_totals()
+        response.headers['Server-Timing'] = server_timing.header_value(total_ms, db_count, db_ms)
+    return response
 
 @app.before_request
 def check_license_status():
     """Check if application is activated"""
     # Allow static files and activation page
-    if request.endpoint in ['static', 'activate', 'activate_post']:
+    if request.endpoint in ['static', 'activate', 'activate_post', 'metrics_endpoint', 'healthz', 'readyz', 'service_worker']:
         return
         
     # Check license
-    if not license_manager.check_license():
+    with server_timing.measure('license'):
+        is_licensed = license_manager.check_license()
+    if not is_licensed:
         return redirect(url_for('activate'))
 
+@app.before_request
+def start_profile():
+    """Profile this request when an admin adds ?_profile=1 (or ?_profile=sample)"""
+    mode = request.args.get('_profile')
+    if not mode or not config.PROFILING_ENABLED:
+        return
+    if getattr(current_user, 'role', None) != 'admin':
+        return
+    g.profile = profiler.start(mode, f'{request.method} {request.path}')
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        response.headers['X-Profile'] = profile.stop()
+    return response
+
+@app.teardown_request
+def discard_profile(error=None):
+    """Save the profile of a request that failed before after_request ran"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.stop()
+
 @app.route('/activate', methods=['GET'])
 def activate():
     """Activation page"""
@@ -85,12 +183,12 @@ def activate_post():
         license_key = request.form.get('license_key', '').strip()
         machine_id = license_manager.get_machine_id()
 
-        print(f"DEBUG: Received license key: {license_key}")
-        print(f"DEBUG: Machine ID: {machine_id}")
+        logger.debug("Received license key: %s", license_key)
+        logger.debug("Machine ID: %s", machine_id)
 
         is_valid, message = license_manager.verify_license_key(license_key, machine_id)
 
-        print(f"DEBUG: Validation result - is_valid: {is_valid}, message: {message}")
+        logger.debug("Validation result - is_valid: %s, message: %s", is_valid, message)
 
         if is_valid:
             try:
@@ -98,7 +196,7 @@ def activate_post():
                 flash('تم تفعيل البرنامج بنجاح!', 'success')
                 return redirect(url_for('index'))
             except Exception as e:
-                print(f"ERROR saving license: {str(e)}")
+                logger.error("Error saving license: %s", e)
                 return render_template('activate.html', machine_id=machine_id, 
                                      error=f"خطأ في حفظ مفتاح التفعيل: {str(e)}")
         else:
@@ -106,9 +204,7 @@ def activate_post():
             # For debugging now, we'll show the full message
             return render_template('activate.html', machine_id=machine_id, error=message)
     except Exception as e:
-        print(f"ERROR in activate_post: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in activate_post: %s", e)
         return render_template('activate.html', machine_id=machine_id, error="Internal Server Error: " + str(e))
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -165,7 +261,7 @@ def dashboard():
 @login_required
 def customers():
     """Customers management page"""
-    conn = get_connection()
+    conn = get_read_connection()
     customers_list = conn.execute('SELECT * FROM customers ORDER BY name').fetchall()
     conn.close()
     return render_template('customers.html', customers=customers_list)
@@ -174,7 +270,7 @@ def customers():
 @login_required
 def weighbridge():
     """Weighbridge transactions page"""
-    conn = get_connection()
+    conn = get_read_connection()
     transactions = [dict(row) for row in conn.execute('''
         SELECT w.*, c.name as customer_name
         FROM weighbridge w
@@ -189,7 +285,7 @@ def weighbridge():
 @login_required
 def crates():
     """Crates management page"""
-    conn = get_connection()
+    conn = get_read_connection()
     crates_list = [dict(row) for row in conn.execute('''
         SELECT cr.*, c.name as customer_name
         FROM crates cr
@@ -204,7 +300,7 @@ def crates():
 @login_required
 def finance():
     """Finance management page"""
-    conn = get_connection()
+    conn = get_read_connection()
     transactions = [dict(row) for row in conn.execute('''
         SELECT f.*, c.name as customer_name
         FROM finance f
@@ -217,6 +313,7 @@ def finance():
 
 # API Endpoints
 @app.route('/api/customers', methods=['GET', 'POST'])
+@etags.conditional('customers')
 def api_customers():
     """API for customers"""
     conn = get_connection()
@@ -291,38 +388,39 @@ def api_delete_customer(customer_id):
         conn.close()
 
 @app.route('/api/dashboard/<int:customer_id>')
+@etags.conditional('weighbridge', 'finance', 'crates')
 def api_dashboard(customer_id):
     """Get dashboard metrics for a specific customer"""
-    conn = get_connection()
-    
-    # Total weight and value from weighbridge
-    weighbridge_stats = conn.execute('''
-        SELECT 
-            COALESCE(SUM(net_weight), 0) as total_weight,
-            COALESCE(SUM(total), 0) as total_value
-        FROM weighbridge 
-        WHERE customer_id = ?
-    ''', (customer_id,)).fetchone()
-    
-    # Finance stats
-    finance_stats = conn.execute('''
-        SELECT 
-            COALESCE(SUM(amount_paid), 0) as total_paid,
-            COALESCE(SUM(amount_received), 0) as total_received
-        FROM finance 
-        WHERE customer_id = ?
-    ''', (customer_id,)).fetchone()
+    def totals(sql):
+        return lambda conn: conn.execute(sql, (customer_id,)).fetchone()
     
-    # Crates balance
-    crates_stats = conn.execute('''
-        SELECT 
-            COALESCE(SUM(crates_out), 0) as total_out,
-            COALESCE(SUM(crates_returned), 0) as total_returned
-        FROM crates 
-        WHERE customer_id = ?
-    ''', (customer_id,)).fetchone()
-    
-    conn.close()
+    # The three aggregates are independent, so they run concurrently
+    weighbridge_stats, finance_stats, crates_stats = read_executor.run(
+        # Total weight and value from weighbridge
+        totals('''
+            SELECT 
+                COALESCE(SUM(net_weight), 0) as total_weight,
+                COALESCE(SUM(total), 0) as total_value
+            FROM weighbridge 
+            WHERE customer_id = ?
+        '''),
+        # Finance stats
+        totals('''
+            SELECT 
+                COALESCE(SUM(amount_paid), 0) as total_paid,
+                COALESCE(SUM(amount_received), 0) as total_received
+            FROM finance 
+            WHERE customer_id = ?
+        '''),
+        # Crates balance
+        totals('''
+            SELECT 
+                COALESCE(SUM(crates_out), 0) as total_out,
+                COALESCE(SUM(crates_returned), 0) as total_returned
+            FROM crates 
+            WHERE customer_id = ?
+        ''')
+    )
     
     return jsonify({
         'total_weight': weighbridge_stats['total_weight'],
@@ -335,6 +433,40 @@ def api_dashboard(customer_id):
         'crates_balance': crates_stats['total_out'] - crates_stats['total_returned']
     })
 
+@app.route('/api/customers/balances')
+@login_required
+@etags.conditional(*report_queries.TABLES)
+def api_customer_balances():
+    """Balances of all customers (?sort=&order=&page=&per_page=, or ?top=N for the first N only)"""
+    sort = request.args.get('sort', 'balance')
+    if sort not in report_queries.BALANCE_SORT_COLUMNS:
+        return jsonify({'error': f"sort must be one of: {', '.join(report_queries.BALANCE_SORT_COLUMNS)}"}), 400
+    order = request.args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': 'order must be asc or desc'}), 400
+    try:
+        top = int(request.args['top']) if 'top' in request.args else None
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', report_queries.DEFAULT_PER_PAGE)), 1),
+                       report_queries.MAX_PER_PAGE)
+    except ValueError:
+        return jsonify({'error': 'top, page and per_page must be numbers'}), 400
+    if top is not None and not 1 <= top <= report_queries.MAX_PER_PAGE:
+        return jsonify({'error': f'top must be between 1 and {report_queries.MAX_PER_PAGE}'}), 400
+    
+    try:
+        key = ('balances', sort, order, top) if top else ('balances', sort, order, page, per_page)
+        versions = etags.table_versions(report_queries.TABLES)
+        body = report_cache.get(key, versions)
+        if body is None:
+            # Compact separators, as jsonify uses outside debug mode
+            body = app.json.dumps(report_queries.customer_balances(sort, order, page, per_page, top),
+                                  separators=(',', ':')).encode('utf-8')
+            report_cache.put(key, versions, body)
+        return Response(body, mimetype=app.json.mimetype)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
 @app.route('/api/weighbridge', methods=['POST'])
 def api_add_weighbridge():
     """Add new weighbridge transaction"""
@@ -342,19 +474,8 @@ def api_add_weighbridge():
     conn = get_connection()
     
     try:
-        # Get qantar weight from settings
-        qantar_weight = conn.execute(
-            'SELECT qantar_weight FROM daily_prices WHERE date = ? LIMIT 1',
-            (data['date'],)
-        ).fetchone()
-        
-        if not qantar_weight:
-            qantar_weight = 100.0  # Default
-        else:
-            qantar_weight = qantar_weight['qantar_weight']
-        
-        # Calculate total
-        total = (float(data['net_weight']) / qantar_weight) * float(data['price_per_qantar'])
+        # Calculate total using the qantar weight of the transaction date
+        total = price_calendar.calculate_total(data['date'], data['net_weight'], data['price_per_qantar'])
         
         conn.execute('''
             INSERT INTO weighbridge (date, customer_id, net_weight, price_per_qantar, total)
@@ -382,7 +503,7 @@ def api_manage_weighbridge(id):
         # PUT - Update
         data = request.json
         # Recalculate total
-        total = (float(data['net_weight']) / 100.0) * float(data['price_per_qantar']) # Assuming 100kg qantar for edit
+        total = price_calendar.calculate_total(data['date'], data['net_weight'], data['price_per_qantar'])
         
         conn.execute('''
             UPDATE weighbridge 
@@ -494,6 +615,7 @@ def settings():
     return render_template('settings.html')
 
 @app.route('/api/settings/prices', methods=['GET', 'POST'])
+@etags.conditional('daily_prices')
 def api_settings_prices():
     """Get or Set daily prices"""
     conn = get_connection()
@@ -505,6 +627,7 @@ def api_settings_prices():
                 VALUES (?, ?)
             ''', (data['date'], data['price']))
             conn.commit()
+            price_calendar.invalidate()
             return jsonify({'success': True, 'message': 'تم حفظ السعر بنجاح'})
         
         # GET - Last 30 prices
@@ -518,6 +641,69 @@ def api_settings_prices():
     finally:
         conn.close()
 
+MAX_PRICE_RANGE_DAYS = 366
+
+@app.route('/api/settings/prices/range', methods=['GET', 'POST'])
+@etags.conditional('daily_prices')
+def api_settings_price_range():
+    """Get or Set daily prices for a whole season"""
+    data = (request.json or {}) if request.method == 'POST' else request.args
+
+    is_valid, start_date, error = SecurityUtils.validate_input(data.get('start'), 'Start date', 'date')
+    if not is_valid:
+        return jsonify({'success': False, 'message': error}), 400
+    is_valid, end_date, error = SecurityUtils.validate_input(data.get('end'), 'End date', 'date')
+    if not is_valid:
+        return jsonify({'success': False, 'message': error}), 400
+
+    days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days + 1
+    if days < 1 or days > MAX_PRICE_RANGE_DAYS:
+        return jsonify({'success': False, 'message': f'الفترة يجب أن تكون بين 1 و {MAX_PRICE_RANGE_DAYS} يوم'}), 400
+
+    try:
+        if request.method == 'POST':
+            prices = data.get('prices', data.get('price'))
+            if prices is None or prices == '':
+                return jsonify({'success': False, 'message': 'يجب إدخال السعر'}), 400
+            written = price_calendar.set_prices(start_date, end_date, prices, data.get('qantar_weight') or None)
+            return jsonify({
+                'success': True,
+                'message': f'تم حفظ أسعار {written} يوم بنجاح',
+                'calendar': price_calendar.get_season(start_date, end_date)
+            })
+
+        return jsonify(price_calendar.get_season(start_date, end_date))
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/api/settings/prices/recalculate', methods=['POST'])
+@login_required
+def api_recalculate_prices():
+    """Recalculate stored weighbridge totals for a date or date range"""
+    data = request.json or {}
+
+    is_valid, start_date, error = SecurityUtils.validate_input(data.get('start'), 'Start date', 'date')
+    if not is_valid:
+        return jsonify({'success': False, 'message': error}), 400
+    is_valid, end_date, error = SecurityUtils.validate_input(data.get('end'), 'End date', 'date', required=False)
+    if not is_valid:
+        return jsonify({'success': False, 'message': error}), 400
+    if end_date and end_date < start_date:
+        return jsonify({'success': False, 'message': 'تاريخ النهاية يجب أن يكون بعد تاريخ البداية'}), 400
+
+    try:
+        summary = price_calendar.recalculate_totals(start_date, end_date, bool(data.get('apply_price')))
+        SecurityUtils.log_security_event('WEIGHBRIDGE_RECALCULATE',
+                                         f"Recalculated {summary['rows_updated']} rows from {summary['start']} to {summary['end']}",
+                                         current_user.id)
+        return jsonify({
+            'success': True,
+            'message': f"تم إعادة حساب {summary['rows_updated']} معاملة",
+            'summary': summary
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/api/settings/backup', methods=['POST'])
 def api_settings_backup():
     """Trigger manual backup"""
@@ -531,6 +717,129 @@ def api_settings_backup():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/admin/queries')
+@admin_required
+def admin_queries():
+    """Slow-query log page"""
+    return render_template('queries.html', slow_query_ms=config.SLOW_QUERY_MS)
+
+@app.route('/api/admin/queries', methods=['GET', 'DELETE'])
+@admin_required
+def api_admin_queries():
+    """Get or reset the slow-query statistics"""
+    if request.method == 'DELETE':
+        query_log.reset()
+        return jsonify({'success': True, 'message': 'تم مسح سجل الاستعلامات'})
+
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({
+        'threshold_ms': config.SLOW_QUERY_MS,
+        'top': query_log.top_queries(limit),
+        'slow': query_log.slow_queries()
+    })
+
+@app.route('/api/admin/profiles')
+@admin_required
+def api_admin_profiles():
+    """List saved request profiles"""
+    return jsonify({
+        'enabled': config.PROFILING_ENABLED,
+        'profiles': profiler.list_profiles()
+    })
+
+@app.route('/admin/profiles/<name>')
+@admin_required
+def download_profile(name):
+    """Download a saved .prof or .collapsed profile"""
+    from flask import send_from_directory
+    if not profiler.is_valid_name(name):
+        return jsonify({'success': False, 'message': 'اسم الملف غير صالح'}), 400
+    return send_from_directory(config.PROFILES_DIR, name, as_attachment=True)
+
+@app.route('/api/admin/jobs/memory')
+@admin_required
+def api_admin_job_memory():
+    """Rows per phase and, when tracing is enabled, memory of the last import and export"""
+    return jsonify({
+        'enabled': config.MEMORY_TRACKING_ENABLED,
+        'jobs': memory_tracker.last_results()
+    })
+
+@app.route('/api/admin/report-cache', methods=['GET', 'DELETE'])
+@admin_required
+def api_admin_report_cache():
+    """Report cache hit/miss statistics; DELETE empties the cache"""
+    if request.method == 'DELETE':
+        report_cache.clear()
+    return jsonify(report_cache.stats())
+
+def server_status(status):
+    uptime = (datetime.now() - started_at).total_seconds()
+    return {
+        'status': status,
+        'version': config.APP_VERSION,
+        'pid': os.getpid(),
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'uptime_seconds': round(uptime, 1)
+    }
+
+@app.route('/healthz')
+@compression.options(enabled=False)
+def healthz():
+    """Liveness: the process is up and answering requests"""
+    return jsonify(server_status('ok'))
+
+@app.route('/readyz')
+@compression.options(enabled=False)
+def readyz():
+    """Readiness: the database answers, its schema is complete and the scheduler runs"""
+    from database import missing_schema
+    checks = {}
+    try:
+        conn = get_connection()
+        try:
+            conn.execute('SELECT 1').fetchone()
+            checks['database'] = 'ok'
+            missing = missing_schema(conn)
+            checks['migrations'] = 'ok' if not missing else 'missing: ' + ', '.join(missing)
+        finally:
+            conn.close()
+    except Exception as e:
+        checks['database'] = f'error: {e}'
+        checks['migrations'] = 'unknown'
+    checks['scheduler'] = 'ok' if scheduler.running else 'stopped'
+
+    ready = all(value == 'ok' for value in checks.values())
+    body = server_status('ready' if ready else 'not_ready')
+    body['checks'] = checks
+    return jsonify(body), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for the local monitoring box"""
+    if not config.METRICS_ENABLED:
+        return Response('metrics disabled\n', status=404, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+# Pages and data the service worker fetches network-first, keeping a copy for when the server is unreachable
+SHELL_PAGES = ['/dashboard', '/customers', '/weighbridge', '/crates', '/finance', '/reports', '/settings']
+SHELL_DATA_PATHS = ['/api/customers', '/api/settings/prices', '/api/settings/prices/range']
+
+app.add_template_global(config.SERVICE_WORKER_ENABLED, 'service_worker_enabled')
+
+@app.route('/sw.js')
+def service_worker():
+    """Service worker, served from the root so it controls every page"""
+    if not config.SERVICE_WORKER_ENABLED:
+        return Response('service worker disabled\n', status=404, mimetype='text/plain')
+    precache = [url for url in [assets.asset_url('css/app.css')] if url]
+    body = render_template('sw.js', version=config.APP_VERSION, precache=precache,
+                           shell_pages=SHELL_PAGES, data_paths=SHELL_DATA_PATHS)
+    response = Response(body, mimetype='application/javascript')
+    # Browsers check for a new worker on each visit; never serve a stale one
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/reports')
 @login_required
 def reports():
@@ -538,52 +847,61 @@ def reports():
     return render_template('reports.html')
 
 @app.route('/api/reports')
+@etags.conditional(*report_queries.TABLES)
 def api_reports():
     """Get filtered reports"""
     start_date = request.args.get('start')
     end_date = request.args.get('end')
     customer_id = request.args.get('customer')
+    fmt = request.args.get('format', 'rows')
+    if fmt not in report_queries.FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(report_queries.FORMATS)}"}), 400
+    # details=0 returns only the summary; by_customer=1 adds the per-customer subtotals
+    details = request.args.get('details', '1').lower() not in ('0', 'false', 'no')
+    by_customer = request.args.get('by_customer', '0').lower() in ('1', 'true', 'yes')
     
-    conn = get_connection()
     try:
-        # Base queries
-        wb_query = "SELECT w.*, c.name as customer_name FROM weighbridge w JOIN customers c ON w.customer_id = c.id WHERE w.date BETWEEN ? AND ?"
-        fin_query = "SELECT f.*, c.name as customer_name FROM finance f JOIN customers c ON f.customer_id = c.id WHERE f.date BETWEEN ? AND ?"
-        cr_query = "SELECT cr.*, c.name as customer_name FROM crates cr JOIN customers c ON cr.customer_id = c.id WHERE cr.date BETWEEN ? AND ?"
-        
-        params = [start_date, end_date]
-        
-        if customer_id:
-            wb_query += " AND w.customer_id = ?"
-            fin_query += " AND f.customer_id = ?"
-            cr_query += " AND cr.customer_id = ?"
-            params.append(customer_id)
-            
-        weighbridge = [dict(r) for r in conn.execute(wb_query, params).fetchall()]
-        finance = [dict(r) for r in conn.execute(fin_query, params).fetchall()]
-        crates = [dict(r) for r in conn.execute(cr_query, params).fetchall()]
-        
-        # Calculate summaries
-        total_weight = sum(r['net_weight'] for r in weighbridge)
-        total_weight_value = sum(r['total'] for r in weighbridge)
-        total_received = sum(r['amount_received'] for r in finance)
-        total_paid = sum(r['amount_paid'] for r in finance)
-        
-        return jsonify({
-            'weighbridge': weighbridge,
-            'finance': finance,
-            'crates': crates,
-            'summary': {
-                'total_weight': total_weight,
-                'total_weight_value': total_weight_value,
-                'total_received': total_received,
-                'total_paid': total_paid
-            }
-        })
+        key = (start_date, end_date, customer_id or None, fmt, details, by_customer)
+        versions = etags.table_versions(report_queries.TABLES)
+        body = report_cache.get(key, versions)
+        if body is None:
+            report = report_queries.build_report(start_date, end_date, customer_id, fmt, details, by_customer)
+            # Compact separators, as jsonify uses outside debug mode
+            body = app.json.dumps(report, separators=(',', ':')).encode('utf-8')
+            report_cache.put(key, versions, body)
+        return Response(body, mimetype=app.json.mimetype)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/reports/<section>')
+@etags.conditional(*report_queries.TABLES)
+def api_report_details(section):
+    """One page of a report section's detail rows (?page=&per_page=&sort=&order=&format=)"""
+    if section not in report_queries.SECTIONS:
+        return jsonify({'error': f'Unknown report section: {section}'}), 404
+    
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        per_page = min(max(int(request.args.get('per_page', report_queries.DEFAULT_PER_PAGE)), 1),
+                       report_queries.MAX_PER_PAGE)
+    except ValueError:
+        return jsonify({'error': 'page and per_page must be numbers'}), 400
+    sort = request.args.get('sort', 'date')
+    if sort not in report_queries.SORT_COLUMNS[section]:
+        return jsonify({'error': f"sort must be one of: {', '.join(report_queries.SORT_COLUMNS[section])}"}), 400
+    order = request.args.get('order', 'asc').lower()
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': 'order must be asc or desc'}), 400
+    fmt = request.args.get('format', 'rows')
+    if fmt not in report_queries.FORMATS:
+        return jsonify({'error': f"format must be one of: {', '.join(report_queries.FORMATS)}"}), 400
+    
+    try:
+        return jsonify(report_queries.detail_page(
+            section, request.args.get('start'), request.args.get('end'), request.args.get('customer'),
+            page, per_page, sort, order, fmt))
     except Exception as e:
         return jsonify({'error': str(e)}), 400
-    finally:
-        conn.close()
 
 @app.route('/import', methods=['GET', 'POST'])
 @login_required
@@ -622,6 +940,7 @@ def import_data():
         
         if 'error' in stats:
             return jsonify({'success': False, 'message': stats['error']}), 500
+        memory = stats.pop('memory', None)
             
         # Calculate total added
         total_added = (
@@ -646,6 +965,7 @@ def import_data():
             'success': True,
             'message': message,
             'stats': stats,
+            'memory': memory,
             'errors': all_errors[:20]  # Return first 20 errors
         })
         
@@ -657,7 +977,7 @@ def import_data():
             try:
                 os.remove(tmp_path)
             except Exception as e:
-                print(f"Warning: Could not clean up temporary file {tmp_path}: {str(e)}")
+                logger.warning("Could not clean up temporary file %s: %s", tmp_path, e)
 
 @app.route('/export')
 @login_required
@@ -667,27 +987,24 @@ def export_excel():
     from flask import send_file
     
     try:
-        # Use secure exports directory from config
-        export_dir = config.EXPORTS_DIR
-        current_dir = os.getcwd()
-        print(f"DEBUG: Current working directory: {current_dir}")
-        print(f"DEBUG: Export directory is: {export_dir}")
-        print(f"DEBUG: Export directory exists: {os.path.exists(export_dir)}")
-        print(f"DEBUG: Export directory writable: {os.access(export_dir, os.W_OK) if os.path.exists(export_dir) else 'N/A'}")
+        # Use secure exports directory from config (created on first export)
+        export_dir = ensure_exports_dir()
+        logger.debug("Current working directory: %s", os.getcwd())
+        logger.debug("Export directory is: %s", export_dir)
         
         # Validate export directory
         if not export_dir or not os.path.exists(export_dir):
-            print(f"ERROR: Export directory does not exist: {export_dir}")
+            logger.error("Export directory does not exist: %s", export_dir)
             return jsonify({'success': False, 'message': f'Export directory does not exist: {export_dir}'}), 500
             
         if not os.access(export_dir, os.W_OK):
-            print(f"ERROR: Export directory is not writable: {export_dir}")
+            logger.error("Export directory is not writable: %s", export_dir)
             return jsonify({'success': False, 'message': f'Export directory is not writable: {export_dir}'}), 500
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f'Date_Factory_Export_{timestamp}.xlsx'
         filepath = os.path.join(export_dir, filename)
-        print(f"DEBUG: Export filepath is: {filepath}")
+        logger.debug("Export filepath is: %s", filepath)
         
         original_filepath = filepath
         actual_filepath = export_to_excel(filepath)
@@ -695,16 +1012,14 @@ def export_excel():
         # Use the actual file path returned by the export function
         # This handles cases where the export function had to use a fallback location
         if actual_filepath != original_filepath:
-            print(f"Export used fallback path: {actual_filepath}")
+            logger.warning("Export used fallback path: %s", actual_filepath)
         
         return send_file(actual_filepath,
                         as_attachment=True,
                         download_name=filename,
                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     except Exception as e:
-        print(f"DEBUG: Export error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Export error: %s", e)
         return jsonify({'success': False, 'message': str(e)}), 500
 
 if __name__ == '__main__':
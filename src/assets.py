@@ -0,0 +1,45 @@
+"""
+Static asset helpers for Date Factory Manager
+Templates call asset_url('css/app.css') to get the content-hashed file built
+by build_tools/build_css.py; hashed files are served with far-future caching
+"""
+import json
+import os
+import re
+
+from flask import current_app, request, url_for
+
+MANIFEST_NAME = 'manifest.json'
+# Built assets carry a 10-character content hash, e.g. css/app.1a2b3c4d5e.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{10}\.\w+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+_manifest = None
+
+
+def load_manifest(static_folder):
+    """Map of logical asset names to hashed file names ({} when nothing is built)"""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(static_folder, MANIFEST_NAME), encoding='utf-8') as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+def asset_url(name):
+    """URL of the built asset, or None when it has not been built"""
+    hashed = load_manifest(current_app.static_folder).get(name)
+    return url_for('static', filename=hashed) if hashed else None
+
+def init_app(app):
+    """Register asset_url for templates and the cache headers for hashed files"""
+    app.add_template_global(asset_url)
+
+    @app.after_request
+    def cache_hashed_assets(response):
+        if request.endpoint == 'static' and response.status_code == 200 \
+                and HASHED_NAME.search(request.path):
+            response.headers['Cache-Control'] = IMMUTABLE
+        return response
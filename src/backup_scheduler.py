@@ -1,13 +1,20 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from datetime import datetime
 import os
-from export import export_to_excel
 
 from config import config
+import metrics
+import logging
 
+logger = logging.getLogger(__name__)
+
+# Failures are logged and returned as None
+@metrics.timed_job('backup', succeeded=lambda filepath: filepath is not None)
 def create_backup(raise_error=False):
     """Create daily backup of database as Excel file"""
     try:
+        from export import export_to_excel
+
         # Use secure backups directory from config
         backups_dir = config.BACKUPS_DIR
         
@@ -19,23 +26,21 @@ def create_backup(raise_error=False):
         # Export to Excel
         export_to_excel(filepath)
         
-        print(f"Backup created successfully: {filepath}")
+        logger.info("Backup created successfully: %s", filepath)
         
         # Upload to Telegram
         try:
             from cloud_upload import upload_backup
             upload_backup(filepath)
         except Exception as e:
-            print(f"Telegram upload skipped: {e}")
+            logger.warning("Telegram upload skipped: %s", e)
         
         # Clean old backups (keep last 30 days)
         cleanup_old_backups()
         
         return filepath
     except Exception as e:
-        print(f"Backup failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Backup failed: %s", e)
         if raise_error:
             raise e
         return None
@@ -57,9 +62,9 @@ def cleanup_old_backups(days_to_keep=30):
                 file_age = current_time - os.path.getmtime(filepath)
                 if file_age > days_in_seconds:
                     os.remove(filepath)
-                    print(f"Deleted old backup: {filename}")
+                    logger.info("Deleted old backup: %s", filename)
     except Exception as e:
-        print(f"Cleanup error: {e}")
+        logger.error("Cleanup error: %s", e)
 
 def start_scheduler():
     """Start the backup scheduler"""
@@ -75,7 +80,7 @@ def start_scheduler():
     )
     
     scheduler.start()
-    print("Backup scheduler started - Daily backup at 11:59 PM")
+    logger.info("Backup scheduler started - Daily backup at 11:59 PM")
     
     return scheduler
 
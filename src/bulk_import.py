@@ -1,6 +1,8 @@
-import openpyxl
-from database import get_connection
+from database import bulk_write, get_connection
+import metrics
 
+# An unreadable file returns (0, 0, [message]); rejected rows alone still count as a run
+@metrics.timed_job('customer_import', succeeded=lambda result: result[1] > 0 or not result[2])
 def import_customers_from_excel(file_path):
     """
     Import customers from Excel file
@@ -9,13 +11,14 @@ def import_customers_from_excel(file_path):
     
     Returns: (success_count, error_count, errors_list)
     """
+    import openpyxl
+
     workbook = None
     try:
         # Load workbook in read-only and data-only mode to avoid locking issues
         workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
         sheet = workbook.active
         
-        conn = get_connection()
         success_count = 0
         error_count = 0
         errors = []
@@ -56,43 +59,46 @@ def import_customers_from_excel(file_path):
         if phone_col is None:
             phone_col = 2
         
-        # Import data
-        for row_idx, row in enumerate(sheet.iter_rows(min_row=start_row, values_only=True), start=start_row):
-            try:
-                if not row or not row[name_col]:
-                    continue
+        # Import data, with one version bump for the whole import instead of one per customer
+        conn = get_connection()
+        try:
+            with bulk_write(conn, 'customers'):
+                for row_idx, row in enumerate(sheet.iter_rows(min_row=start_row, values_only=True), start=start_row):
+                    try:
+                        if not row or not row[name_col]:
+                            continue
                 
-                name = str(row[name_col]).strip()
-                customer_type = str(row[type_col]).strip() if type_col < len(row) and row[type_col] else 'عميل عادي'
-                phone = str(row[phone_col]).strip() if phone_col < len(row) and row[phone_col] else ''
+                        name = str(row[name_col]).strip()
+                        customer_type = str(row[type_col]).strip() if type_col < len(row) and row[type_col] else 'عميل عادي'
+                        phone = str(row[phone_col]).strip() if phone_col < len(row) and row[phone_col] else ''
                 
-                # Validate
-                if not name:
-                    errors.append(f"Row {row_idx}: اسم العميل فارغ")
-                    error_count += 1
-                    continue
+                        # Validate
+                        if not name:
+                            errors.append(f"Row {row_idx}: اسم العميل فارغ")
+                            error_count += 1
+                            continue
                 
-                # Insert into database
-                conn.execute(
-                    'INSERT OR IGNORE INTO customers (name, type, phone) VALUES (?, ?, ?)',
-                    (name, customer_type, phone)
-                )
+                        # Insert into database
+                        conn.execute(
+                            'INSERT OR IGNORE INTO customers (name, type, phone) VALUES (?, ?, ?)',
+                            (name, customer_type, phone)
+                        )
                 
-                if conn.total_changes > 0:
-                    success_count += 1
-                else:
-                    errors.append(f"Row {row_idx}: العميل '{name}' موجود بالفعل")
-                    error_count += 1
+                        if conn.total_changes > 0:
+                            success_count += 1
+                        else:
+                            errors.append(f"Row {row_idx}: العميل '{name}' موجود بالفعل")
+                            error_count += 1
                     
-            except Exception as e:
-                errors.append(f"Row {row_idx}: {str(e)}")
-                error_count += 1
-        
-        # Delete the sheet reference to avoid keeping workbook open
-        del sheet
+                    except Exception as e:
+                        errors.append(f"Row {row_idx}: {str(e)}")
+                        error_count += 1
         
-        conn.commit()
-        conn.close()
+                # Delete the sheet reference to avoid keeping workbook open
+                del sheet
+            conn.commit()
+        finally:
+            conn.close()
         
         return success_count, error_count, errors
         
@@ -2,6 +2,9 @@ import os
 from telegram import Bot
 from telegram.error import TelegramError
 import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Configuration - You need to set these values
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', 'YOUR_BOT_TOKEN_HERE')
@@ -20,14 +23,10 @@ async def send_file_to_telegram(file_path, caption=None):
     """
     try:
         if TELEGRAM_BOT_TOKEN == 'YOUR_BOT_TOKEN_HERE':
-            print("⚠️ Telegram bot token not configured!")
-            print("📝 To enable Telegram upload:")
-            print("   1. Create a bot with @BotFather on Telegram")
-            print("   2. Get your bot token")
-            print("   3. Get your chat ID (use @userinfobot)")
-            print("   4. Set environment variables:")
-            print("      - TELEGRAM_BOT_TOKEN=your_token")
-            print("      - TELEGRAM_CHAT_ID=your_chat_id")
+            logger.warning(
+                "Telegram bot token not configured! To enable Telegram upload: "
+                "create a bot with @BotFather, get its token and your chat ID (use @userinfobot), "
+                "then set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID")
             return False
         
         bot = Bot(token=TELEGRAM_BOT_TOKEN)
@@ -39,14 +38,14 @@ async def send_file_to_telegram(file_path, caption=None):
                 caption=caption or f"📊 Date Factory Backup - {os.path.basename(file_path)}"
             )
         
-        print(f"✅ File sent to Telegram successfully: {file_path}")
+        logger.info("File sent to Telegram successfully: %s", file_path)
         return True
         
     except TelegramError as e:
-        print(f"❌ Telegram error: {e}")
+        logger.error("Telegram error: %s", e)
         return False
     except Exception as e:
-        print(f"❌ Error sending file: {e}")
+        logger.error("Error sending file: %s", e)
         return False
 
 def upload_backup(file_path):
@@ -56,7 +55,7 @@ def upload_backup(file_path):
     try:
         asyncio.run(send_file_to_telegram(file_path))
     except Exception as e:
-        print(f"❌ Upload failed: {e}")
+        logger.error("Upload failed: %s", e)
 
 if __name__ == '__main__':
     # Test upload
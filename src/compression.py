@@ -0,0 +1,122 @@
+"""
+Response compression for Date Factory Manager
+Compresses text, JSON and JavaScript responses with brotli (when the brotli
+package is installed) or gzip, as negotiated through Accept-Encoding.
+Responses under COMPRESSION_MIN_SIZE are sent as they are, and streamed
+responses are compressed chunk by chunk. Views can override the settings with
+@compression.options(...).
+"""
+import zlib
+
+from flask import request
+from werkzeug.wsgi import ClosingIterator
+
+from config import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/javascript', 'image/svg+xml')
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def options(enabled=True, min_size=None, level=None):
+    """Per-view compression settings: turn it off or change the threshold or level"""
+    def decorator(view):
+        view.compression = {'enabled': enabled, 'min_size': min_size, 'level': level}
+        return view
+    return decorator
+
+def is_compressible(response):
+    mimetype = response.mimetype or ''
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+def choose_encoding():
+    """Best encoding the client accepts, or None"""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+def make_compressor(encoding, level):
+    if encoding == 'br':
+        return _Brotli(level if level is not None else config.BROTLI_QUALITY)
+    return _Gzip(level if level is not None else config.COMPRESSION_LEVEL)
+
+def _compress_stream(chunks, compressor):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def compress_response(response, view_options):
+    if not is_compressible(response) or response.status_code != 200 or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+    min_size = view_options.get('min_size')
+    min_size = config.COMPRESSION_MIN_SIZE if min_size is None else min_size
+    compressor = make_compressor(encoding, view_options.get('level'))
+
+    if response.is_streamed or response.direct_passthrough:
+        # Unknown (or file-backed) body: compress as it is sent
+        length = response.content_length
+        if length is not None and length < min_size:
+            return response
+        original = response.response
+        closers = [original.close] if hasattr(original, 'close') else []
+        response.direct_passthrough = False
+        response.response = ClosingIterator(_compress_stream(original, compressor), closers)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compressor.compress(data) + compressor.flush())
+
+    response.headers['Content-Encoding'] = encoding
+    # The bytes differ from the uncompressed representation, so the ETag can only be weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def init_app(app):
+    """Compress responses after every other after_request hook has run"""
+
+    @app.after_request
+    def compress(response):
+        if not config.COMPRESSION_ENABLED:
+            return response
+        view = app.view_functions.get(request.endpoint)
+        view_options = getattr(view, 'compression', {})
+        if not view_options.get('enabled', True):
+            return response
+        return compress_response(response, view_options)
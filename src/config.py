@@ -2,6 +2,7 @@
 Secure configuration management for Date Factory Manager
 Handles environment variables and secure defaults
 """
+import logging
 import os
 from datetime import datetime
 from pathlib import Path
@@ -39,39 +40,27 @@ except ImportError:
 
 
 def get_app_data_dir():
-    """Get the application data directory in AppData"""
+    """Get the application data directory in AppData (created on first use)"""
     app_data = os.getenv('APPDATA')
     if not app_data:
         app_data = os.path.expanduser('~')
-    
-    data_dir = os.path.join(app_data, 'DateFactoryManager')
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir, exist_ok=True)
-    return data_dir
+    return os.path.join(app_data, 'DateFactoryManager')
 
 def get_exports_dir():
-    """Get the exports directory in User Documents"""
-    try:
-        docs_dir = os.path.join(os.path.expanduser('~'), 'Documents')
-        exports_dir = os.path.join(docs_dir, 'Date Factory Manager', 'Exports')
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir, exist_ok=True)
-        return exports_dir
-    except Exception as e:
-        print(f"ERROR in get_exports_dir(): {e}")
-        # If Documents directory is not accessible, try current directory
-        exports_dir = os.path.join(os.getcwd(), 'exports')
-        if not os.path.exists(exports_dir):
-            os.makedirs(exports_dir, exist_ok=True)
-        return exports_dir
+    """Get the exports directory in User Documents (created on first use)"""
+    docs_dir = os.path.join(os.path.expanduser('~'), 'Documents')
+    return os.path.join(docs_dir, 'Date Factory Manager', 'Exports')
 
 def get_backups_dir():
-    """Get the backups directory in User Documents"""
+    """Get the backups directory in User Documents (created on first use)"""
     docs_dir = os.path.join(os.path.expanduser('~'), 'Documents')
-    backups_dir = os.path.join(docs_dir, 'Date Factory Manager', 'Backups')
-    if not os.path.exists(backups_dir):
-        os.makedirs(backups_dir, exist_ok=True)
-    return backups_dir
+    return os.path.join(docs_dir, 'Date Factory Manager', 'Backups')
+
+def ensure_dir(path):
+    """Create a directory if it does not exist yet and return it"""
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+    return path
 
 class Config:
     """Application configuration with secure defaults"""
@@ -110,6 +99,63 @@ class Config:
     APP_NAME = "Date Factory Manager"
     APP_VERSION = "1.0.0"
     
+    # Query Log Configuration
+    QUERY_LOG_ENABLED = os.environ.get('QUERY_LOG_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+    
+    # Metrics Configuration
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    
+    # Add Server-Timing headers with a per-request phase breakdown
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    
+    # Admin request profiling (?_profile=1 or ?_profile=sample)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    PROFILES_DIR = os.environ.get('PROFILES_DIR', os.path.join(DATA_DIR, 'profiles'))
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', '20'))
+    
+    # tracemalloc instrumentation for import and export jobs (slows them down, off by default)
+    MEMORY_TRACKING_ENABLED = os.environ.get('MEMORY_TRACKING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    MEMORY_TOP_SITES = int(os.environ.get('MEMORY_TOP_SITES', '10'))
+    MEMORY_TRACE_FRAMES = int(os.environ.get('MEMORY_TRACE_FRAMES', '1'))
+    
+    # Logging (JSON lines in LOG_DIR/app.log; LOG_LEVELS sets per-module levels, e.g. export=DEBUG)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+    LOG_DIR = os.environ.get('LOG_DIR', os.path.join(DATA_DIR, 'logs'))
+    LOG_FILE_ENABLED = os.environ.get('LOG_FILE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+    LOG_BACKUPS = int(os.environ.get('LOG_BACKUPS', '5'))
+    
+    # Security events are also written to the audit_log table in batches
+    AUDIT_LOG_ENABLED = os.environ.get('AUDIT_LOG_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '50'))
+    AUDIT_FLUSH_SECONDS = float(os.environ.get('AUDIT_FLUSH_SECONDS', '2'))
+    
+    # Launcher capture of the server's console output (DATA_DIR/server_output.log)
+    SERVER_LOG_FILE_ENABLED = os.environ.get('SERVER_LOG_FILE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    SERVER_LOG_MAX_BYTES = int(os.environ.get('SERVER_LOG_MAX_BYTES', str(1024 * 1024)))
+    SERVER_LOG_BACKUPS = int(os.environ.get('SERVER_LOG_BACKUPS', '3'))
+    
+    # LRU cache of /api/reports results, dropped automatically when the report's tables change
+    REPORT_CACHE_ENABLED = os.environ.get('REPORT_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    REPORT_CACHE_SIZE = int(os.environ.get('REPORT_CACHE_SIZE', '32'))
+    REPORT_CACHE_MAX_MB = int(os.environ.get('REPORT_CACHE_MAX_MB', '64'))
+    
+    # Threads running the independent read queries of a report or dashboard side by side (1 runs them in turn)
+    READ_WORKERS = int(os.environ.get('READ_WORKERS', '3'))
+    # Page cache of each read executor worker's long-lived connection, in KB
+    READ_CACHE_KB = int(os.environ.get('READ_CACHE_KB', '16384'))
+    
+    # gzip/brotli compression of text and JSON responses larger than COMPRESSION_MIN_SIZE bytes
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', '6'))
+    BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', '5'))
+    
+    # Service worker caching of the app shell for phones (browsers need HTTPS or localhost)
+    SERVICE_WORKER_ENABLED = os.environ.get('SERVICE_WORKER_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    
     # Backup Configuration
     BACKUP_RETENTION_DAYS = int(os.environ.get('BACKUP_RETENTION_DAYS', '30'))
     
@@ -129,8 +175,18 @@ if Config.is_production():
     missing_vars = [var for var in required_env_vars if not os.environ.get(var)]
     
     if missing_vars:
-        print(f"ERROR: Missing required environment variables for production: {missing_vars}")
-        print("Please set these variables before running in production mode.")
+        logging.getLogger(__name__).error(
+            "Missing required environment variables for production: %s. "
+            "Please set these variables before running in production mode.", missing_vars)
         
 # Export config instance for easy import
 config = Config()
+
+def ensure_exports_dir():
+    """Create the exports directory on first use, falling back to ./exports"""
+    try:
+        return ensure_dir(config.EXPORTS_DIR)
+    except OSError as e:
+        logging.getLogger(__name__).error("Error creating exports directory %s: %s", config.EXPORTS_DIR, e)
+        config.EXPORTS_DIR = ensure_dir(os.path.join(os.getcwd(), 'exports'))
+        return config.EXPORTS_DIR
@@ -1,17 +1,74 @@
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 import os
+from urllib.parse import quote
 from config import config
 from security_utils import SecurityUtils
+import query_log
+import metrics
+import logging
+
+logger = logging.getLogger(__name__)
 
 DB_PATH = config.DATABASE_PATH
 
+# Schema objects created by init_db; readiness fails while any is missing
+REQUIRED_TABLES = ('customers', 'daily_prices', 'weighbridge', 'crates', 'finance', 'users', 'audit_log',
+                   'table_versions')
+REQUIRED_INDEXES = ('idx_weighbridge_customer', 'idx_weighbridge_date', 'idx_crates_customer', 'idx_finance_customer',
+                    'idx_audit_log_timestamp')
+
+# Tables whose writes bump a change counter in table_versions (used for ETags)
+VERSIONED_TABLES = ('customers', 'daily_prices', 'weighbridge', 'crates', 'finance')
+VERSION_TRIGGERS = tuple(f'trg_{table}_{event}_version' for table in VERSIONED_TABLES
+                         for event in ('insert', 'update', 'delete'))
+
 def get_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
+    """Get database connection (timed by the query log when enabled)"""
+    if config.QUERY_LOG_ENABLED:
+        conn = sqlite3.connect(DB_PATH, factory=query_log.TimedConnection)
+    else:
+        conn = sqlite3.connect(DB_PATH)
+    metrics.db_connections_opened_total.inc()
     conn.row_factory = sqlite3.Row
     return conn
 
+def _read_only_uri(path):
+    path = os.path.abspath(path).replace(os.sep, '/')
+    if not path.startswith('/'):
+        # Windows drive path: file:///C:/...
+        path = '/' + path
+    return f"file://{quote(path, safe='/:')}?mode=ro"
+
+def get_read_connection(cache_kb=None):
+    """
+    Get a read-only connection for reports, dashboards, list pages and exports
+    The file is opened with mode=ro and query_only is set, so a reader can
+    never take a write lock or leave a write transaction open. Long-lived
+    connections (the read executor's) pass cache_kb for a larger page cache.
+    """
+    factory = query_log.TimedConnection if config.QUERY_LOG_ENABLED else sqlite3.Connection
+    conn = sqlite3.connect(_read_only_uri(DB_PATH), uri=True, factory=factory)
+    metrics.db_connections_opened_total.inc()
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA query_only = ON')
+    if cache_kb:
+        # Larger page cache and in-memory sorting for scans and GROUP BY over whole tables
+        conn.execute(f'PRAGMA cache_size = -{cache_kb}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+    return conn
+
+def _create_version_triggers(cursor, table):
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version
+            AFTER {event} ON {table}
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+            END
+        ''')
+
 def init_db():
     """Initialize database with tables"""
     conn = get_connection()
@@ -94,15 +151,78 @@ def init_db():
         )
     ''')
     
+    # Security audit trail (written in batches by logging_setup.AuditHandler)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            user_id INTEGER,
+            ip_address TEXT,
+            details TEXT
+        )
+    ''')
+    
     # Create indexes for better performance
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_weighbridge_customer ON weighbridge(customer_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_weighbridge_date ON weighbridge(date)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_crates_customer ON crates(customer_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_finance_customer ON finance(customer_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log(timestamp)')
+    
+    # Change counters, bumped by triggers on every write to a versioned table
+    # (bulk writes bump them once instead, see bulk_write)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for table in VERSIONED_TABLES:
+        cursor.execute('INSERT OR IGNORE INTO table_versions (table_name) VALUES (?)', (table,))
+        _create_version_triggers(cursor, table)
     
     conn.commit()
     conn.close()
-    print("Database initialized successfully!")
+    logger.info("Database initialized successfully!")
+
+def missing_schema(conn):
+    """Names of required tables, indexes and triggers that do not exist yet"""
+    existing = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'index', 'trigger')")}
+    return [name for name in REQUIRED_TABLES + REQUIRED_INDEXES + VERSION_TRIGGERS if name not in existing]
+
+def get_table_versions(conn, tables):
+    """Current change counter of each table, e.g. {'customers': 12}"""
+    placeholders = ', '.join('?' * len(tables))
+    rows = conn.execute(f'SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})',
+                        tuple(tables)).fetchall()
+    return {row['table_name']: row['version'] for row in rows}
+
+@contextmanager
+def bulk_write(conn, *tables):
+    """
+    Writes in the block bump each table's version once instead of once per row;
+    commit afterwards. The per-row version triggers are dropped inside the
+    block's transaction, so other connections keep seeing them. An exception
+    rolls the whole transaction back, triggers included.
+    """
+    # sqlite3 does not open a transaction before DDL by itself
+    if not conn.in_transaction:
+        conn.execute('BEGIN IMMEDIATE')
+    for table in tables:
+        for event in ('insert', 'update', 'delete'):
+            conn.execute(f'DROP TRIGGER IF EXISTS trg_{table}_{event}_version')
+    try:
+        yield
+    except BaseException:
+        conn.rollback()
+        raise
+    for table in tables:
+        _create_version_triggers(conn, table)
+    placeholders = ', '.join('?' * len(tables))
+    conn.execute(f'UPDATE table_versions SET version = version + 1 WHERE table_name IN ({placeholders})',
+                 tuple(tables))
 
 def add_sample_data():
     """Add sample data for testing"""
@@ -130,9 +250,9 @@ def add_sample_data():
                       ('admin', hashed_admin_password, 'admin'))
 
         conn.commit()
-        print("Sample data added successfully!")
+        logger.info("Sample data added successfully!")
     except Exception as e:
-        print(f"Error adding sample data: {e}")
+        logger.error("Error adding sample data: %s", e)
     finally:
         conn.close()
 
@@ -0,0 +1,63 @@
+"""
+Conditional GET support for Date Factory Manager
+A view decorated with @etags.conditional('customers', ...) gets a strong ETag
+built from the change counters of the tables it reads. When the client's
+If-None-Match still matches, the view is skipped and a 304 is returned after
+a single lookup in table_versions.
+"""
+import hashlib
+from functools import partial, wraps
+
+from flask import Response, g, make_response, request
+
+from config import config
+from database import get_table_versions
+import metrics
+import read_executor
+
+
+def _read_versions(tables):
+    # On this thread's long-lived read connection rather than a new one per request
+    versions, = read_executor.run(partial(get_table_versions, tables=tables))
+    return versions
+
+def compute_etag(tables):
+    """Strong ETag for the current request given the tables its response reads"""
+    versions = _read_versions(tables)
+    # The view can tag cached results with the same versions (see table_versions())
+    g.table_versions = versions
+    parts = [config.APP_VERSION, request.full_path]
+    parts += [f'{table}={versions.get(table, 0)}' for table in sorted(tables)]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+def conditional(*tables):
+    """Answer GET requests with 304 Not Modified while the tables are unchanged"""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            etag = compute_etag(tables)
+            # Weak comparison: compression turns the ETag of a compressed response into W/"..."
+            not_modified = request.if_none_match.contains_weak(etag)
+            metrics.record_cache('etag', not_modified)
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Let browsers keep the body but revalidate on every use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapped
+    return decorator
+
+def table_versions(tables):
+    """Table versions read for this request's ETag, or read now if there were none"""
+    versions = g.get('table_versions')
+    if versions is None or set(versions) != set(tables):
+        versions = _read_versions(tables)
+    return versions
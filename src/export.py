@@ -1,15 +1,23 @@
-import xlsxwriter
 from datetime import datetime
-from database import get_connection
+from database import get_read_connection
 import os
 
 from config import config
+import metrics
+import memory_tracker
+import logging
 
+logger = logging.getLogger(__name__)
+
+@metrics.timed_job('export')
+@memory_tracker.tracked_job('export')
 def export_to_excel(output_path=None):
     """
     Export all database data to Excel file
     Returns the file path
     """
+    import xlsxwriter
+
     if output_path is None:
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         output_path = os.path.join(config.EXPORTS_DIR, f'Date_Factory_Export_{timestamp}.xlsx')
@@ -21,11 +29,9 @@ def export_to_excel(output_path=None):
     export_dir = os.path.dirname(output_path)
     if not os.path.exists(export_dir):
         os.makedirs(export_dir, exist_ok=True)
-        print(f"DEBUG: Created export directory: {export_dir}")
+        logger.debug("Created export directory: %s", export_dir)
     
-    print(f"DEBUG: Attempting to create Excel file at: {output_path}")
-    print(f"DEBUG: Output directory exists: {os.path.exists(export_dir)}")
-    print(f"DEBUG: Output directory is writable: {os.access(export_dir, os.W_OK) if os.path.exists(export_dir) else 'N/A'}")
+    logger.debug("Attempting to create Excel file at: %s", output_path)
     
     # Create workbook
     # Try to create the workbook, and if it fails due to permissions, try a fallback location
@@ -33,8 +39,7 @@ def export_to_excel(output_path=None):
     try:
         workbook = xlsxwriter.Workbook(output_path)
     except PermissionError:
-        print(f"Permission denied to write to: {output_path}")
-        print("Attempting to use fallback export directory...")
+        logger.warning("Permission denied to write to: %s; using the fallback export directory", output_path)
         
         # Try to use a fallback directory in the current working directory
         fallback_dir = os.path.join(os.getcwd(), 'exports')
@@ -42,19 +47,19 @@ def export_to_excel(output_path=None):
             os.makedirs(fallback_dir, exist_ok=True)
         
         fallback_path = os.path.join(fallback_dir, os.path.basename(output_path))
-        print(f"Using fallback path: {fallback_path}")
+        logger.warning("Using fallback path: %s", fallback_path)
         workbook = xlsxwriter.Workbook(fallback_path)
         # Update output_path to the fallback path
         output_path = fallback_path
     except Exception as e:
-        print(f"Unexpected error creating workbook: {e}")
+        logger.error("Unexpected error creating workbook: %s", e)
         # If there's any other error, also try the fallback
         fallback_dir = os.path.join(os.getcwd(), 'exports')
         if not os.path.exists(fallback_dir):
             os.makedirs(fallback_dir, exist_ok=True)
         
         fallback_path = os.path.join(fallback_dir, os.path.basename(output_path))
-        print(f"Using fallback path due to error: {fallback_path}")
+        logger.warning("Using fallback path due to error: %s", fallback_path)
         workbook = xlsxwriter.Workbook(fallback_path)
         output_path = fallback_path
     
@@ -71,7 +76,7 @@ def export_to_excel(output_path=None):
     date_fmt = workbook.add_format({'num_format': 'dd/mm/yyyy', 'align': 'center', 'valign': 'vcenter', 'border': 1})
     num_fmt = workbook.add_format({'num_format': '#,##0.00', 'align': 'center', 'valign': 'vcenter', 'border': 1})
     
-    conn = get_connection()
+    conn = get_read_connection()
     
     # 1. Customers Sheet
     sheet_customers = workbook.add_worksheet('العملاء (Customers)')
@@ -92,6 +97,7 @@ def export_to_excel(output_path=None):
         sheet_customers.write(idx-1, 2, customer['type'], cell_fmt)
         sheet_customers.write(idx-1, 3, customer['phone'] or '-', cell_fmt)
         sheet_customers.write(idx-1, 4, customer['created_at'][:10] if customer['created_at'] else '-', cell_fmt)
+    memory_tracker.phase('customers', len(customers))
     
     # 2. Weighbridge Sheet
     sheet_wb = workbook.add_worksheet('الميزان (Weighbridge)')
@@ -116,6 +122,7 @@ def export_to_excel(output_path=None):
         sheet_wb.write(idx-1, 2, trans['net_weight'], num_fmt)
         sheet_wb.write(idx-1, 3, trans['price_per_qantar'], num_fmt)
         sheet_wb.write(idx-1, 4, trans['total'], num_fmt)
+    memory_tracker.phase('weighbridge', len(weighbridge))
     
     # 3. Crates Sheet
     sheet_crates = workbook.add_worksheet('الصناديق (Crates)')
@@ -142,6 +149,7 @@ def export_to_excel(output_path=None):
         sheet_crates.write(idx-1, 3, crate['crates_returned'], cell_fmt)
         sheet_crates.write(idx-1, 4, crate['handler'] or '-', cell_fmt)
         sheet_crates.write(idx-1, 5, crate['notes'] or '-', cell_fmt)
+    memory_tracker.phase('crates', len(crates))
     
     # 4. Finance Sheet
     sheet_finance = workbook.add_worksheet('المالية (Finance)')
@@ -169,6 +177,7 @@ def export_to_excel(output_path=None):
         sheet_finance.write(idx-1, 3, fin['amount_paid'], num_fmt)
         sheet_finance.write(idx-1, 4, fin['amount_received'], num_fmt)
         sheet_finance.write(idx-1, 5, fin['notes'] or '-', cell_fmt)
+    memory_tracker.phase('finance', len(finance))
     
     # 5. Dashboard Summary Sheet
     sheet_summary = workbook.add_worksheet('ملخص العملاء (Summary)')
@@ -218,11 +227,13 @@ def export_to_excel(output_path=None):
         sheet_summary.write(idx-1, 6, crate_stats['total_out'], cell_fmt)
         sheet_summary.write(idx-1, 7, crate_stats['total_returned'], cell_fmt)
         sheet_summary.write(idx-1, 8, crates_balance, cell_fmt)
+    memory_tracker.phase('summary', len(customers))
     
     conn.close()
     workbook.close()
+    memory_tracker.phase('save')
     
-    print(f"Excel file exported successfully: {output_path}")
+    logger.info("Excel file exported successfully: %s", output_path)
     return output_path
 
 if __name__ == '__main__':
@@ -9,6 +9,9 @@ from datetime import datetime
 
 # Security: Secret key now managed through config.py
 from config import config
+import logging
+
+logger = logging.getLogger(__name__)
 SECRET_KEY = config.get_license_secret_key()
 
 def get_machine_id():
@@ -71,10 +74,9 @@ def verify_license_key(license_key, machine_id):
         expected_signature = hmac.new(SECRET_KEY, payload_str.encode(), hashlib.sha256).hexdigest()[:16].upper()
         
         # DEBUG LOGGING
-        print(f"DEBUG: Checking Key: {license_key}")
-        print(f"DEBUG: Using Secret Key (first 5 chars): {str(SECRET_KEY)[:5]}...")
-        print(f"DEBUG: Expected Signature: {expected_signature}")
-        print(f"DEBUG: Actual Signature:   {signature}")
+        logger.debug("Checking key: %s", license_key)
+        logger.debug("Expected signature: %s", expected_signature)
+        logger.debug("Actual signature:   %s", signature)
         
         if signature != expected_signature:
             return False, f"Invalid signature (Expected: {expected_signature}, Got: {signature})"
@@ -104,20 +106,18 @@ def get_license_file_path():
         app_data = os.path.expanduser('~')
     
     app_dir = os.path.join(app_data, 'DateFactoryManager')
-    if not os.path.exists(app_dir):
-        os.makedirs(app_dir, exist_ok=True)
-        
     return os.path.join(app_dir, 'license.key')
 
 def save_license(license_key):
     """Saves the license key to a file in AppData."""
     try:
         license_path = get_license_file_path()
+        os.makedirs(os.path.dirname(license_path), exist_ok=True)
         with open(license_path, "w") as f:
             f.write(license_key)
         return True
     except Exception as e:
-        print(f"Error saving license: {e}")
+        logger.error("Error saving license: %s", e)
         raise e
 
 def load_license():
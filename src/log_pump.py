@@ -0,0 +1,81 @@
+"""
+Non-blocking log pump for the server subprocess
+Reader threads drain the server's stdout and stderr into a bounded ring
+buffer (and optionally a rotating log file), so the server never blocks on a
+full pipe while the launcher shows the output at its own pace
+"""
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+class LogPump:
+    """Drain a subprocess's output pipes into a ring buffer"""
+
+    def __init__(self, process, max_lines=2000, log_path=None, max_bytes=1024 * 1024, backup_count=3):
+        self.process = process
+        self.lines = deque(maxlen=max_lines)
+        self.total = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._file_logger = None
+
+        if log_path:
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self._file_logger = logging.getLogger(f'dfm.server_output.{id(self)}')
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    def start(self):
+        for stream_name, pipe in (('stdout', self.process.stdout), ('stderr', self.process.stderr)):
+            if pipe is None:
+                continue
+            thread = threading.Thread(target=self._drain, args=(stream_name, pipe),
+                                      name=f'log-pump-{stream_name}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _drain(self, stream_name, pipe):
+        """Read lines until the pipe closes; never blocks the server"""
+        try:
+            for raw in iter(pipe.readline, b''):
+                text = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+                with self._lock:
+                    self.total += 1
+                    self.lines.append((self.total, stream_name, text))
+                if self._file_logger:
+                    self._file_logger.info('[%s] %s', stream_name, text)
+        except (OSError, ValueError):
+            pass
+        finally:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def read_since(self, seq):
+        """
+        Lines after sequence number seq
+        Returns: (lines, last_seq, dropped) where dropped counts lines that
+        fell out of the buffer before they were read
+        """
+        with self._lock:
+            new_lines = [line for line in self.lines if line[0] > seq]
+            last_seq = self.total
+        dropped = (new_lines[0][0] - seq - 1) if new_lines else 0
+        return new_lines, last_seq, dropped
+
+    def is_alive(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def close(self):
+        """Wait briefly for the readers and release the log file"""
+        for thread in self._threads:
+            thread.join(timeout=1)
+        if self._file_logger:
+            for handler in list(self._file_logger.handlers):
+                handler.close()
+                self._file_logger.removeHandler(handler)
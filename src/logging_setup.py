@@ -0,0 +1,184 @@
+"""
+Central logging setup for Date Factory Manager
+Request threads only put records on a queue; a QueueListener thread writes
+them to the console and to a rotating JSON-lines file. Security events are
+also written to the audit_log table in batches, whatever LOG_LEVEL is.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config import config, ensure_dir
+
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+_audit_handler = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the extra= fields included"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class AuditHandler(logging.Handler):
+    """Write security events to the audit_log table in batches from a background thread"""
+
+    def __init__(self, batch_size=50, flush_seconds=2.0):
+        super().__init__(logging.INFO)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._pending = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        self.addFilter(lambda record: hasattr(record, 'audit'))
+
+    def emit(self, record):
+        audit = record.audit
+        details = audit.get('details')
+        if details is not None and not isinstance(details, str):
+            details = json.dumps(details, ensure_ascii=False, default=str)
+        self._pending.put((
+            audit.get('timestamp') or datetime.fromtimestamp(record.created).isoformat(),
+            audit.get('event_type') or record.getMessage(),
+            audit.get('user_id'),
+            audit.get('ip_address'),
+            details
+        ))
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+        # Write whatever arrived before close()
+        while True:
+            batch = self._take_batch(wait=False)
+            if not batch:
+                break
+            self._write(batch)
+
+    def _take_batch(self, wait=True):
+        batch = []
+        try:
+            batch.append(self._pending.get(timeout=self.flush_seconds) if wait else self._pending.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._pending.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch):
+        from database import get_connection
+        try:
+            conn = get_connection()
+            try:
+                conn.executemany('''
+                    INSERT INTO audit_log (timestamp, event_type, user_id, ip_address, details)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', batch)
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            # Never log through the pipeline here; that would loop back into this handler
+            sys.stderr.write(f"Audit log write failed ({len(batch)} events): {e}\n")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        super().close()
+
+
+def parse_levels(text):
+    """Parse 'export=DEBUG,query_log=WARNING' into {logger: level}"""
+    levels = {}
+    for part in (text or '').split(','):
+        name, _, level = part.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging():
+    """Install the queue-based logging pipeline once per process"""
+    global _listener, _audit_handler
+    with _lock:
+        if _listener is not None:
+            return
+
+        handlers = []
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s', '%H:%M:%S'))
+        handlers.append(console)
+
+        if config.LOG_FILE_ENABLED:
+            try:
+                log_path = os.path.join(ensure_dir(config.LOG_DIR), 'app.log')
+                file_handler = RotatingFileHandler(log_path, maxBytes=config.LOG_MAX_BYTES,
+                                                   backupCount=config.LOG_BACKUPS, encoding='utf-8')
+                file_handler.setFormatter(JsonFormatter())
+                handlers.append(file_handler)
+            except OSError as e:
+                sys.stderr.write(f"File logging disabled, cannot open {config.LOG_DIR}: {e}\n")
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(config.LOG_LEVEL.upper())
+        for name, level in parse_levels(config.LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+
+        if config.AUDIT_LOG_ENABLED:
+            # The audit trail must not depend on how verbose the log is: the security logger
+            # always passes INFO to its own AuditHandler and forwards to the console and file
+            # only what LOG_LEVEL / LOG_LEVELS allow
+            security = logging.getLogger('security')
+            log_level = security.getEffectiveLevel()
+            _audit_handler = AuditHandler(config.AUDIT_BATCH_SIZE, config.AUDIT_FLUSH_SECONDS)
+            forward = QueueHandler(log_queue)
+            forward.setLevel(log_level)
+            security.addHandler(_audit_handler)
+            security.addHandler(forward)
+            security.setLevel(min(log_level, logging.INFO))
+            security.propagate = False
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Flush queued records and pending audit events"""
+    global _listener, _audit_handler
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        if _audit_handler is not None:
+            _audit_handler.close()
+            _audit_handler = None
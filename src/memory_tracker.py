@@ -0,0 +1,145 @@
+"""
+Memory instrumentation for import and export jobs
+When MEMORY_TRACKING_ENABLED is set, jobs run under tracemalloc and report
+their peak memory, the top allocation sites and the rows handled per phase
+"""
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+from config import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+_last_results = {}
+_lock = threading.Lock()
+_current = threading.local()
+# tracemalloc is process-wide, so only one job is traced at a time
+_tracing = threading.Lock()
+
+
+def _mb(size):
+    return round(size / (1024 * 1024), 2)
+
+
+class JobMemory:
+    """Collects phase rows and, while tracing, memory usage for one job run"""
+
+    def __init__(self, job, tracing):
+        self.job = job
+        self.tracing = tracing
+        self.phases = []
+        self.peak = 0
+        self.peak_snapshot = None
+        self.result = None
+        self.started = time.perf_counter()
+        self._phase_started = self.started
+
+    def phase(self, name, rows=0):
+        """Close a phase of the job, recording its rows and peak memory"""
+        now = time.perf_counter()
+        entry = {'phase': name, 'rows': rows, 'seconds': round(now - self._phase_started, 3)}
+        self._phase_started = now
+        metrics.job_rows_total.inc(rows, job=self.job, phase=name)
+
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            entry['current_mb'] = _mb(current)
+            entry['peak_mb'] = _mb(peak)
+            # Keep the snapshot taken with the most memory held for the allocation sites
+            if self.peak_snapshot is None or current > self.peak_snapshot[0]:
+                self.peak_snapshot = (current, tracemalloc.take_snapshot())
+            self.peak = max(self.peak, peak)
+            tracemalloc.reset_peak()
+        self.phases.append(entry)
+
+    def summary(self):
+        result = {
+            'job': self.job,
+            'seconds': round(time.perf_counter() - self.started, 3),
+            'rows': sum(p['rows'] for p in self.phases),
+            'phases': self.phases
+        }
+        if self.tracing:
+            result['peak_mb'] = _mb(self.peak)
+            result['top_sites'] = self._top_sites()
+        return result
+
+    def _top_sites(self):
+        if self.peak_snapshot is None:
+            return []
+        snapshot = self.peak_snapshot[1].filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+        return [{
+            'site': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+            'size_kb': round(stat.size / 1024, 1),
+            'count': stat.count
+        } for stat in snapshot.statistics('lineno')[:config.MEMORY_TOP_SITES]]
+
+
+@contextmanager
+def track(job):
+    """
+    Run a job block with memory tracking; yields a JobMemory whose phase()
+    marks the end of each phase. Tracing only happens when enabled.
+    """
+    tracing = (config.MEMORY_TRACKING_ENABLED and not tracemalloc.is_tracing()
+               and _tracing.acquire(blocking=False))
+    if tracing:
+        tracemalloc.start(config.MEMORY_TRACE_FRAMES)
+        tracemalloc.reset_peak()
+
+    memory = JobMemory(job, tracing)
+    previous = getattr(_current, 'memory', None)
+    _current.memory = memory
+    try:
+        yield memory
+        if tracing:
+            # Include anything allocated after the last phase
+            memory.peak = max(memory.peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        _current.memory = previous
+        if tracing:
+            tracemalloc.stop()
+            _tracing.release()
+
+    result = memory.result = memory.summary()
+    with _lock:
+        _last_results[job] = result
+    if tracing:
+        metrics.job_peak_memory_bytes.set(memory.peak, job=job)
+        logger.info("MEMORY %s: %s", job, json.dumps(result, ensure_ascii=False), extra={'job_memory': result})
+
+def tracked_job(job):
+    """
+    Decorator form of track; a dict result (other than an error) gets the
+    summary under 'memory'
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            with track(job) as memory:
+                result = func(*args, **kwargs)
+            if isinstance(result, dict) and 'error' not in result:
+                result['memory'] = memory.result
+            return result
+        return wrapped
+    return decorator
+
+def phase(name, rows=0):
+    """Close a phase of the job running in this thread, if any"""
+    memory = getattr(_current, 'memory', None)
+    if memory is not None:
+        memory.phase(name, rows)
+
+def last_results():
+    """Most recent result per job"""
+    with _lock:
+        return dict(_last_results)
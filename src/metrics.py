@@ -0,0 +1,229 @@
+"""
+Prometheus-style metrics for Date Factory Manager
+Small thread-safe counters, gauges and histograms rendered in the Prometheus
+text exposition format at /metrics
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class holding one value per label combination"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for name, key, value in self._samples():
+            lines.append(f'{name}{_format_labels(self.labelnames, key)} {_format_value(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are computed when metrics are rendered"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self):
+        return [(self.name, tuple(str(v) for v in key), value) for key, value in self.callback().items()]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = [(key, list(state[0]), state[1], state[2]) for key, state in self._values.items()]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def render():
+    """Render every registered metric in Prometheus text format"""
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+# HTTP requests
+http_requests_total = Counter(
+    'dfm_http_requests_total', 'HTTP requests handled', ('endpoint', 'method', 'status'))
+http_request_duration_seconds = Histogram(
+    'dfm_http_request_duration_seconds', 'HTTP request latency', ('endpoint', 'method'))
+http_requests_in_flight = Gauge(
+    'dfm_http_requests_in_flight', 'HTTP requests currently being handled')
+
+# Database
+db_queries_per_request = Histogram(
+    'dfm_db_queries_per_request', 'SQL statements executed per HTTP request', ('endpoint',),
+    buckets=(1, 2, 5, 10, 20, 50, 100, 500, 1000))
+db_seconds_per_request = Histogram(
+    'dfm_db_seconds_per_request', 'Time spent in SQL per HTTP request', ('endpoint',))
+db_connections_opened_total = Counter(
+    'dfm_db_connections_opened_total', 'SQLite connections opened (there is no pool, one per use)')
+
+# Background and bulk jobs
+job_duration_seconds = Histogram(
+    'dfm_job_duration_seconds', 'Duration of export, import and backup jobs', ('job', 'result'),
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+job_rows_total = Counter(
+    'dfm_job_rows_total', 'Rows handled by export and import jobs', ('job', 'phase'))
+job_peak_memory_bytes = Gauge(
+    'dfm_job_peak_memory_bytes', 'Peak traced memory of the last run (MEMORY_TRACKING_ENABLED only)', ('job',))
+
+# Caches
+cache_requests_total = Counter(
+    'dfm_cache_requests_total', 'Cache lookups', ('cache', 'result'))
+
+def _cache_hit_ratios():
+    ratios = {}
+    with cache_requests_total._lock:
+        caches = {key[0] for key in cache_requests_total._values}
+    for cache in caches:
+        hits = cache_requests_total.get(cache=cache, result='hit')
+        total = hits + cache_requests_total.get(cache=cache, result='miss')
+        ratios[(cache,)] = hits / total if total else 0
+    return ratios
+
+cache_hit_ratio = CallbackGauge(
+    'dfm_cache_hit_ratio', 'Share of cache lookups served from the cache', _cache_hit_ratios, ('cache',))
+
+
+def record_cache(cache, hit):
+    """Count one cache lookup"""
+    cache_requests_total.inc(cache=cache, result='hit' if hit else 'miss')
+
+@contextmanager
+def track_job(job):
+    """Time a job and record it under dfm_job_duration_seconds"""
+    started = time.perf_counter()
+    result = 'error'
+    try:
+        yield
+        result = 'success'
+    finally:
+        job_duration_seconds.observe(time.perf_counter() - started, job=job, result=result)
+
+def timed_job(job, succeeded=None):
+    """
+    Decorator form of track_job. Jobs that report failure through their
+    return value instead of raising pass succeeded(result) -> bool.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            started = time.perf_counter()
+            result = 'error'
+            try:
+                value = func(*args, **kwargs)
+                if succeeded is None or succeeded(value):
+                    result = 'success'
+                return value
+            finally:
+                job_duration_seconds.observe(time.perf_counter() - started, job=job, result=result)
+        return wrapped
+    return decorator
@@ -0,0 +1,198 @@
+"""
+In-memory daily price calendar for Date Factory Manager
+Caches daily_prices as date -> (price_per_qantar, qantar_weight) so every
+weighbridge write path computes totals the same way without a query per row
+"""
+import threading
+from datetime import datetime, timedelta
+from database import bulk_write, get_connection
+import metrics
+
+DEFAULT_QANTAR_WEIGHT = 100.0
+
+_calendar = None
+_lock = threading.Lock()
+
+def _load_calendar():
+    """Read the whole daily_prices table into a dict"""
+    conn = get_connection()
+    try:
+        rows = conn.execute('SELECT date, price_per_qantar, qantar_weight FROM daily_prices').fetchall()
+    finally:
+        conn.close()
+    return {str(row['date']): (row['price_per_qantar'], row['qantar_weight'] or DEFAULT_QANTAR_WEIGHT)
+            for row in rows}
+
+def get_calendar():
+    """Get the cached calendar, loading it on first use"""
+    global _calendar
+    calendar = _calendar
+    metrics.record_cache('price_calendar', calendar is not None)
+    if calendar is None:
+        with _lock:
+            if _calendar is None:
+                _calendar = _load_calendar()
+            calendar = _calendar
+    return calendar
+
+def invalidate():
+    """Drop the cached calendar (call after writing to daily_prices)"""
+    global _calendar
+    with _lock:
+        _calendar = None
+
+def get_price(date):
+    """Get (price_per_qantar, qantar_weight) for a date, or None if no price is set"""
+    return get_calendar().get(str(date))
+
+def get_qantar_weight(date):
+    """Get the qantar weight (kg) for a date, falling back to the default"""
+    entry = get_price(date)
+    return entry[1] if entry else DEFAULT_QANTAR_WEIGHT
+
+def calculate_total(date, net_weight, price_per_qantar):
+    """Calculate a weighbridge total using the qantar weight of its date"""
+    return (float(net_weight) / get_qantar_weight(date)) * float(price_per_qantar)
+
+def _recalculated_total_sql(apply_price):
+    """SQL expression for a weighbridge row's total under the current calendar"""
+    price = 'weighbridge.price_per_qantar'
+    if apply_price:
+        price = ('COALESCE((SELECT p.price_per_qantar FROM daily_prices p WHERE p.date = weighbridge.date), '
+                 'weighbridge.price_per_qantar)')
+    qantar_weight = ('COALESCE((SELECT NULLIF(p.qantar_weight, 0) FROM daily_prices p WHERE p.date = weighbridge.date), '
+                     f'{DEFAULT_QANTAR_WEIGHT})')
+    return f'(weighbridge.net_weight / {qantar_weight}) * {price}', price
+
+def recalculate_totals(start_date, end_date=None, apply_price=False):
+    """
+    Recalculate stored weighbridge totals from the daily price calendar
+    
+    Args:
+        start_date: First date to recalculate ('YYYY-MM-DD')
+        end_date: Last date to recalculate (defaults to start_date)
+        apply_price: Also replace each row's price_per_qantar with the day's price
+    
+    Returns: dict with a per-date diff summary of the rows that changed
+    """
+    end_date = end_date or start_date
+    new_total, new_price = _recalculated_total_sql(apply_price)
+    changed = f'''
+        weighbridge.date BETWEEN ? AND ?
+        AND (ABS(weighbridge.total - {new_total}) > 0.000001
+             OR ABS(weighbridge.price_per_qantar - {new_price}) > 0.000001)
+    '''
+    params = (start_date, end_date)
+    
+    conn = get_connection()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        
+        # Summarize the affected rows before touching them
+        dates = [dict(row) for row in conn.execute(f'''
+            SELECT weighbridge.date as date,
+                   COUNT(*) as rows,
+                   SUM(weighbridge.total) as old_total,
+                   SUM({new_total}) as new_total
+            FROM weighbridge
+            WHERE {changed}
+            GROUP BY weighbridge.date
+            ORDER BY weighbridge.date
+        ''', params).fetchall()]
+        
+        with bulk_write(conn, 'weighbridge'):
+            cursor = conn.execute(f'''
+                UPDATE weighbridge
+                SET total = {new_total}, price_per_qantar = {new_price}
+                WHERE {changed}
+            ''', params)
+            rows_updated = cursor.rowcount
+        
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    old_sum = sum(d['old_total'] for d in dates)
+    new_sum = sum(d['new_total'] for d in dates)
+    return {
+        'start': start_date,
+        'end': end_date,
+        'rows_updated': rows_updated,
+        'old_total': old_sum,
+        'new_total': new_sum,
+        'difference': new_sum - old_sum,
+        'dates': dates
+    }
+
+def _date_range(start_date, end_date):
+    """List every 'YYYY-MM-DD' date from start_date to end_date inclusive"""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    days = (datetime.strptime(end_date, '%Y-%m-%d') - start).days
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days + 1)]
+
+def set_prices(start_date, end_date, prices, qantar_weight=None):
+    """
+    Set daily prices for every date in a range in one transaction
+    
+    Args:
+        start_date: First date of the range ('YYYY-MM-DD')
+        end_date: Last date of the range ('YYYY-MM-DD')
+        prices: A single price for every day, or a list with one price per day
+                (None entries leave that day unchanged)
+        qantar_weight: Qantar weight (kg) to set, or None to keep the existing one
+    
+    Returns: number of days written
+    """
+    dates = _date_range(start_date, end_date)
+    if not isinstance(prices, (list, tuple)):
+        prices = [prices] * len(dates)
+    if len(prices) != len(dates):
+        raise ValueError(f'Expected {len(dates)} prices, got {len(prices)}')
+    
+    if qantar_weight is not None:
+        qantar_weight = float(qantar_weight)
+        if qantar_weight <= 0:
+            raise ValueError('Qantar weight must be positive')
+    
+    rows = [(date, float(price), qantar_weight, qantar_weight)
+            for date, price in zip(dates, prices) if price is not None]
+    
+    conn = get_connection()
+    try:
+        with bulk_write(conn, 'daily_prices'):
+            conn.executemany(f'''
+                INSERT INTO daily_prices (date, price_per_qantar, qantar_weight)
+                VALUES (?, ?, COALESCE(?, {DEFAULT_QANTAR_WEIGHT}))
+                ON CONFLICT(date) DO UPDATE SET
+                    price_per_qantar = excluded.price_per_qantar,
+                    qantar_weight = COALESCE(?, daily_prices.qantar_weight)
+            ''', rows)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    invalidate()
+    return len(rows)
+
+def get_season(start_date, end_date):
+    """
+    Get the calendar for a date range in a compact form
+    
+    Returns: dict with one array entry per day starting at start_date
+             (None for days without a price)
+    """
+    calendar = get_calendar()
+    dates = _date_range(start_date, end_date)
+    entries = [calendar.get(date) for date in dates]
+    return {
+        'start': start_date,
+        'end': end_date,
+        'prices': [entry[0] if entry else None for entry in entries],
+        'qantar_weights': [entry[1] if entry else None for entry in entries]
+    }
@@ -0,0 +1,134 @@
+"""
+Per-request profiler for Date Factory Manager
+Admins add ?_profile=1 to a URL to profile that request with cProfile (.prof,
+open with snakeviz or pstats) or ?_profile=sample to sample its stack and
+write flamegraph-compatible collapsed stacks (.collapsed)
+"""
+import cProfile
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 0.001
+PROFILE_NAME = re.compile(r'^[\w.-]+\.(prof|collapsed)$')
+
+# cProfile cannot run twice at once, so only one request is profiled at a time
+_active = threading.Lock()
+
+
+class StackSampler:
+    """Record one thread's call stack at a fixed interval from a background thread"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}'.replace(';', ','))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def dump_stats(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class RequestProfile:
+    """A running profile of the current request"""
+
+    def __init__(self, mode, label):
+        self.mode = mode
+        self.label = label
+        self.started = time.perf_counter()
+        if mode == 'sample':
+            self.profiler = StackSampler(threading.get_ident())
+            self.profiler.start()
+        else:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def stop(self):
+        """Stop profiling, save the result and return its file name"""
+        try:
+            if self.mode == 'sample':
+                self.profiler.stop()
+            else:
+                self.profiler.disable()
+            elapsed_ms = (time.perf_counter() - self.started) * 1000
+
+            os.makedirs(config.PROFILES_DIR, exist_ok=True)
+            extension = 'collapsed' if self.mode == 'sample' else 'prof'
+            slug = re.sub(r'[^\w-]+', '_', self.label).strip('_')[:60] or 'root'
+            name = f"{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{slug}_{elapsed_ms:.0f}ms.{extension}"
+            self.profiler.dump_stats(os.path.join(config.PROFILES_DIR, name))
+            prune()
+            logger.info("Profile saved: %s", name)
+            return name
+        finally:
+            _active.release()
+
+
+def start(mode, label):
+    """Start profiling the current request; returns None if another profile is running"""
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        return RequestProfile('sample' if mode == 'sample' else 'cprofile', label)
+    except Exception:
+        _active.release()
+        raise
+
+def list_profiles():
+    """Saved profiles, newest first"""
+    if not os.path.exists(config.PROFILES_DIR):
+        return []
+    profiles = []
+    for name in os.listdir(config.PROFILES_DIR):
+        if not PROFILE_NAME.match(name):
+            continue
+        stat = os.stat(os.path.join(config.PROFILES_DIR, name))
+        profiles.append({
+            'name': name,
+            'format': 'collapsed' if name.endswith('.collapsed') else 'prof',
+            'size': stat.st_size,
+            'created': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+        })
+    profiles.sort(key=lambda p: p['name'], reverse=True)
+    return profiles
+
+def prune():
+    """Keep only the newest PROFILE_KEEP profiles"""
+    for profile in list_profiles()[config.PROFILE_KEEP:]:
+        try:
+            os.remove(os.path.join(config.PROFILES_DIR, profile['name']))
+        except OSError as e:
+            logger.warning("Could not remove old profile %s: %s", profile['name'], e)
+
+def is_valid_name(name):
+    return bool(PROFILE_NAME.match(name))
@@ -0,0 +1,259 @@
+"""
+Slow-query log for Date Factory Manager
+Times every statement run through database.get_connection and get_read_connection,
+keeps per-statement totals and captures EXPLAIN QUERY PLAN for statements over the threshold
+"""
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+SLOW_LOG_SIZE = 200
+# Distinct statements kept in _stats; the one with the least total time makes room for a new one
+STATS_SIZE = 500
+
+_stats = {}
+_slow_log = deque(maxlen=SLOW_LOG_SIZE)
+_lock = threading.Lock()
+_request = threading.local()
+
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+def normalize_sql(sql):
+    """Collapse whitespace so the same statement always has the same key"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+def params_shape(params, many=False):
+    """Describe parameters by type only, never by value"""
+    if many:
+        if not isinstance(params, (list, tuple)):
+            return 'many x ?'
+        first = params_shape(params[0]) if params else '()'
+        return f'{len(params)} x {first}'
+    if params is None:
+        return '()'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{k}: {type(v).__name__}' for k, v in params.items()) + '}'
+    return '(' + ', '.join(type(v).__name__ for v in params) + ')'
+
+def current_route():
+    """Name of the Flask endpoint issuing the query, or the thread name outside a request"""
+    # Worker threads running a request's queries report the request's route
+    route = getattr(_request, 'route', None)
+    if route:
+        return route
+    try:
+        from flask import has_request_context, request
+        if has_request_context():
+            return request.endpoint or request.path
+    except ImportError:
+        pass
+    return threading.current_thread().name
+
+def begin_request(route=None):
+    """Start counting statements and SQL time for the current thread's request"""
+    _request.count = 0
+    _request.total_ms = 0.0
+    _request.route = route
+
+def end_request():
+    """Stop counting for the current request and return (statement count, total ms)"""
+    totals = (getattr(_request, 'count', 0), getattr(_request, 'total_ms', 0.0))
+    _request.count = None
+    _request.route = None
+    return totals
+
+def add_to_request(count, total_ms):
+    """Add statements run on another thread on behalf of the current request"""
+    if getattr(_request, 'count', None) is not None:
+        _request.count += count
+        _request.total_ms += total_ms
+
+def request_totals():
+    """Statement count and SQL time so far for the current request"""
+    return getattr(_request, 'count', None) or 0, getattr(_request, 'total_ms', 0.0)
+
+def record(sql, elapsed_ms, shape, route, plan=None):
+    """Add one statement execution to the statistics"""
+    if getattr(_request, 'count', None) is not None:
+        _request.count += 1
+        _request.total_ms += elapsed_ms
+
+    key = normalize_sql(sql)
+    slow = elapsed_ms >= config.SLOW_QUERY_MS
+    slow_entry = None
+
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            if len(_stats) >= STATS_SIZE:
+                del _stats[min(_stats, key=lambda k: _stats[k]['total_ms'])]
+            entry = _stats[key] = {
+                'sql': key,
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'slow_count': 0,
+                'params_shape': shape,
+                'routes': {},
+                'plan': None
+            }
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+        entry['routes'][route] = entry['routes'].get(route, 0) + 1
+        if plan is not None:
+            entry['plan'] = plan
+        if slow:
+            entry['slow_count'] += 1
+            slow_entry = {
+                'timestamp': datetime.now().isoformat(),
+                'sql': key,
+                'elapsed_ms': round(elapsed_ms, 2),
+                'params_shape': shape,
+                'route': route,
+                'plan': entry['plan']
+            }
+            _slow_log.append(slow_entry)
+
+    if slow_entry:
+        logger.warning("SLOW QUERY: %s", json.dumps(slow_entry, ensure_ascii=False), extra={'slow_query': slow_entry})
+
+def needs_plan(sql):
+    """Whether a slow statement should have its query plan captured"""
+    if not normalize_sql(sql).upper().startswith(_EXPLAINABLE):
+        return False
+    with _lock:
+        entry = _stats.get(normalize_sql(sql))
+        return entry is None or entry['plan'] is None
+
+def top_queries(limit=20):
+    """Statements ordered by total time spent in them"""
+    with _lock:
+        entries = [dict(e, routes=dict(e['routes'])) for e in _stats.values()]
+    entries.sort(key=lambda e: e['total_ms'], reverse=True)
+    for entry in entries:
+        entry['avg_ms'] = entry['total_ms'] / entry['count'] if entry['count'] else 0
+    return entries[:limit]
+
+def slow_queries():
+    """Most recent slow statements, newest first"""
+    with _lock:
+        return list(reversed(_slow_log))
+
+def reset():
+    """Clear all collected statistics"""
+    with _lock:
+        _stats.clear()
+        _slow_log.clear()
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times each statement including fetching its rows"""
+
+    _pending = None
+
+    def _start(self, sql, params, many=False):
+        self._finish()
+        self._pending = [sql, params, many, 0.0]
+
+    def _add(self, started):
+        if self._pending is not None:
+            self._pending[3] += (time.perf_counter() - started) * 1000
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        sql, params, many, elapsed_ms = pending
+        plan = None
+        if elapsed_ms >= config.SLOW_QUERY_MS and needs_plan(sql):
+            plan = self.connection.explain(sql, params[0] if many and params else params)
+        record(sql, elapsed_ms, params_shape(params, many), current_route(), plan)
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._add(started)
+            if self.description is None:
+                self._finish()
+
+    def executemany(self, sql, seq_of_parameters):
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        self._start(sql, seq_of_parameters, many=True)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._add(started)
+            self._finish()
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._add(started)
+            self._finish()
+            raise
+        self._add(started)
+        return row
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._add(started)
+        self._finish()
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        self._add(started)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._add(started)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection that hands out TimedCursors"""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def explain(self, sql, params=()):
+        """Get EXPLAIN QUERY PLAN output for a statement as a list of lines"""
+        try:
+            rows = super().cursor(sqlite3.Cursor).execute(f'EXPLAIN QUERY PLAN {sql}', params or ()).fetchall()
+            return [row[-1] for row in rows]
+        except sqlite3.Error as e:
+            return [f'EXPLAIN failed: {e}']
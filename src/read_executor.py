@@ -0,0 +1,85 @@
+"""
+Concurrent read queries for Date Factory Manager
+run() executes the independent read queries of one request on a small thread
+pool. Every worker keeps its own read-only connection, so the queries of a
+report or dashboard run side by side and the request waits only for the
+slowest one. A single task (or READ_WORKERS=1) runs on the calling thread,
+on that thread's own long-lived connection. Statement counts and SQL time
+from the workers are added to the request's query log totals (and so to its
+Server-Timing header).
+"""
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import config
+import database
+import query_log
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _connection():
+    """This thread's connection, reopened when the database path has changed"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.path != database.DB_PATH:
+        _close_connection()
+        # Only the pool's few workers get the larger page cache; request threads can be many
+        cache_kb = config.READ_CACHE_KB if getattr(_local, 'worker', False) else None
+        conn = _local.conn = database.get_read_connection(cache_kb)
+        _local.path = database.DB_PATH
+    return conn
+
+def _close_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        _local.conn = None
+        conn.close()
+
+def _mark_worker():
+    _local.worker = True
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config.READ_WORKERS, thread_name_prefix='db-read',
+                                           initializer=_mark_worker)
+        return _executor
+
+def _run_tasks(tasks):
+    conn = _connection()
+    try:
+        return [task(conn) for task in tasks]
+    except sqlite3.Error:
+        # Start the next task on a fresh connection
+        _close_connection()
+        raise
+
+def _run_task(task, route):
+    query_log.begin_request(route)
+    try:
+        result, = _run_tasks([task])
+    finally:
+        totals = query_log.end_request()
+    return result, totals
+
+def run(*tasks):
+    """
+    Run callables that each take a connection and return fully fetched
+    results; returns their results in the order given
+    """
+    if config.READ_WORKERS <= 1 or len(tasks) < 2 or getattr(_local, 'worker', False):
+        return _run_tasks(tasks)
+
+    route = query_log.current_route()
+    executor = _get_executor()
+    futures = [executor.submit(_run_task, task, route) for task in tasks]
+    results = []
+    for future in futures:
+        result, (count, total_ms) = future.result()
+        query_log.add_to_request(count, total_ms)
+        results.append(result)
+    return results
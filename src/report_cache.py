@@ -0,0 +1,99 @@
+"""
+In-process LRU cache of /api/reports and /api/customers/balances responses
+for Date Factory Manager. Entries are keyed by the request parameters and
+tagged with the change counters of the tables they read, so any write to
+those tables makes the cached response stale without explicit invalidation
+"""
+import threading
+from collections import OrderedDict
+
+from config import config
+import metrics
+
+
+class ReportCache:
+    """LRU of serialized reports bounded by entry count and total bytes"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def get(self, key, versions):
+        """Cached body for key if it was built from the same table versions"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != versions:
+                # Data changed since the report was built
+                self._remove(key)
+                self.stale += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.record_cache('report', entry is not None)
+        return entry[1] if entry is not None else None
+
+    def put(self, key, versions, body):
+        # A single report larger than a quarter of the budget would flush everything else
+        if len(body) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (versions, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, body = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+_cache = ReportCache(config.REPORT_CACHE_SIZE, config.REPORT_CACHE_MAX_MB * 1024 * 1024)
+
+
+def get(key, versions):
+    if not config.REPORT_CACHE_ENABLED:
+        return None
+    return _cache.get(key, versions)
+
+def put(key, versions, body):
+    if config.REPORT_CACHE_ENABLED:
+        _cache.put(key, versions, body)
+
+def clear():
+    _cache.clear()
+
+def stats():
+    return dict(_cache.stats(), enabled=config.REPORT_CACHE_ENABLED)
@@ -0,0 +1,255 @@
+"""
+Report queries for Date Factory Manager
+The summary comes from SQL aggregates, one query per section; with
+by_customer set the same queries are grouped per customer and also return the
+per-customer subtotals. Detail rows are returned either as a list of row
+objects (the default) or, with format=columnar, as column names plus one
+value array per column, with customer names sent once in a lookup table.
+Detail rows can be fetched a page at a time with detail_page(), and
+customer_balances() lists every customer's running balance.
+The queries of a report run concurrently through read_executor.
+"""
+from functools import partial
+
+import read_executor
+
+# Section name -> (table, alias) of the detail rows in a report
+SECTIONS = {
+    'weighbridge': ('weighbridge', 'w'),
+    'finance': ('finance', 'f'),
+    'crates': ('crates', 'cr'),
+}
+
+# Per-customer subtotals computed for each section: (key, column summed)
+AGGREGATES = {
+    'weighbridge': (('total_weight', 'net_weight'), ('total_weight_value', 'total')),
+    'finance': (('total_received', 'amount_received'), ('total_paid', 'amount_paid')),
+    'crates': (('crates_out', 'crates_out'), ('crates_returned', 'crates_returned')),
+}
+
+# Columns each detail section can be sorted by
+SORT_COLUMNS = {
+    'weighbridge': ('date', 'customer_name', 'net_weight', 'price_per_qantar', 'total'),
+    'finance': ('date', 'customer_name', 'transaction_type', 'amount_paid', 'amount_received'),
+    'crates': ('date', 'customer_name', 'crates_out', 'crates_returned'),
+}
+
+# Columns the all-customers balance list can be sorted by
+BALANCE_SORT_COLUMNS = ('balance', 'total_value', 'total_weight', 'total_received', 'total_paid',
+                        'crates_balance', 'customer_name')
+
+# Tables a report reads; their change counters tag cached reports and ETags
+TABLES = ('customers', 'weighbridge', 'finance', 'crates')
+
+FORMATS = ('rows', 'columnar')
+DEFAULT_PER_PAGE = 100
+MAX_PER_PAGE = 500
+
+
+def _from_where(table, alias, customer_id, join_customers=True):
+    sql = f"FROM {table} {alias} "
+    if join_customers:
+        sql += f"JOIN customers c ON {alias}.customer_id = c.id "
+    sql += f"WHERE {alias}.date BETWEEN ? AND ?"
+    if customer_id:
+        sql += f" AND {alias}.customer_id = ?"
+    return sql
+
+def _params(start_date, end_date, customer_id):
+    params = [start_date, end_date]
+    if customer_id:
+        params.append(customer_id)
+    return params
+
+def _columnar(cursor):
+    """Transpose a cursor's rows into {'columns', 'values', 'count'}"""
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    values = [list(column) for column in zip(*rows)] if rows else [[] for _ in columns]
+    return {'columns': columns, 'values': values, 'count': len(rows)}
+
+def _customer_names(conn):
+    """{id: name} of every customer"""
+    # The customers table is small; filtering it in Python avoids SQLite's parameter limit
+    return {row[0]: row[1] for row in conn.execute('SELECT id, name FROM customers')}
+
+def _section_totals(conn, section, params, customer_id, by_customer):
+    table, alias = SECTIONS[section]
+    sums = ', '.join(f'COALESCE(SUM({alias}.{column}), 0) AS {key}' for key, column in AGGREGATES[section])
+    if not by_customer:
+        # Customers with transactions cannot be deleted, so the join would not drop any row
+        from_where = _from_where(table, alias, customer_id, join_customers=False)
+        return conn.execute(f'SELECT COUNT(*) AS row_count, {sums} {from_where}', params).fetchall()
+    return conn.execute(f'''
+        SELECT c.id AS customer_id, c.name AS customer_name, COUNT(*) AS row_count, {sums}
+        {_from_where(table, alias, customer_id)}
+        GROUP BY c.id
+    ''', params).fetchall()
+
+def _section_rows(conn, section, params, customer_id, fmt):
+    table, alias = SECTIONS[section]
+    if fmt == 'columnar':
+        return _columnar(conn.execute(f'SELECT {alias}.* {_from_where(table, alias, customer_id)}', params))
+    sql = f'SELECT {alias}.*, c.name as customer_name {_from_where(table, alias, customer_id)}'
+    return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+def _summary(section_totals):
+    """Add up the aggregate rows of each section into the report summary"""
+    summary = {}
+    for section, rows in section_totals.items():
+        for key, _ in AGGREGATES[section]:
+            summary[key] = sum(row[key] for row in rows)
+    summary['counts'] = {section: sum(row['row_count'] for row in rows) for section, rows in section_totals.items()}
+    return summary
+
+def _by_customer(section_totals):
+    """Merge the grouped rows of each section into per-customer subtotals"""
+    empty = {'weighbridge_count': 0, 'finance_count': 0, 'crates_count': 0}
+    for section_aggregates in AGGREGATES.values():
+        empty.update((key, 0) for key, _ in section_aggregates)
+
+    by_customer = {}
+    for section, rows in section_totals.items():
+        for row in rows:
+            entry = by_customer.setdefault(row['customer_id'], dict(
+                empty, customer_id=row['customer_id'], customer_name=row['customer_name']))
+            entry[f'{section}_count'] = row['row_count']
+            for key, _ in AGGREGATES[section]:
+                entry[key] = row[key]
+
+    customers = sorted(by_customer.values(), key=lambda e: e['customer_name'])
+    for entry in customers:
+        entry['balance'] = entry['total_weight_value'] + entry['total_received'] - entry['total_paid']
+        entry['crates_balance'] = entry['crates_out'] - entry['crates_returned']
+    return customers
+
+def build_report(start_date, end_date, customer_id=None, fmt='rows', details=True, by_customer=False):
+    """
+    Summary, the per-customer subtotals when by_customer is set, and (when
+    details is set) every detail row of each section in the requested
+    format. The queries of all sections run concurrently on the read executor.
+    """
+    params = _params(start_date, end_date, customer_id)
+    tasks = [partial(_section_totals, section=section, params=params, customer_id=customer_id,
+                     by_customer=by_customer)
+             for section in SECTIONS]
+    if details:
+        tasks += [partial(_section_rows, section=section, params=params, customer_id=customer_id, fmt=fmt)
+                  for section in SECTIONS]
+        if fmt == 'columnar':
+            tasks.append(_customer_names)
+    results = read_executor.run(*tasks)
+
+    section_totals = dict(zip(SECTIONS, results))
+    report = {'summary': _summary(section_totals)}
+    if by_customer:
+        report['by_customer'] = _by_customer(section_totals)
+    if not details:
+        return report
+    rows = results[len(SECTIONS):2 * len(SECTIONS)]
+    report.update(zip(SECTIONS, rows))
+    if fmt == 'columnar':
+        report['format'] = 'columnar'
+        customer_ids = set()
+        for data in rows:
+            customer_ids.update(data['values'][data['columns'].index('customer_id')])
+        report['customers'] = {cid: name for cid, name in results[-1].items() if cid in customer_ids}
+    return report
+
+def detail_page(section, start_date, end_date, customer_id=None, page=1, per_page=DEFAULT_PER_PAGE,
+                sort='date', order='asc', fmt='rows'):
+    """One page of a section's detail rows, sorted by one of SORT_COLUMNS[section]"""
+    table, alias = SECTIONS[section]
+    params = _params(start_date, end_date, customer_id)
+    from_where = _from_where(table, alias, customer_id)
+
+    direction = 'DESC' if order == 'desc' else 'ASC'
+    sort_expr = 'c.name' if sort == 'customer_name' else f'{alias}.{sort}'
+    # Tie-break on id so rows never move between pages
+    paging = f'ORDER BY {sort_expr} {direction}, {alias}.id {direction} LIMIT ? OFFSET ?'
+    page_params = params + [per_page, (page - 1) * per_page]
+
+    def count(conn):
+        return conn.execute(f'SELECT COUNT(*) {from_where}', params).fetchone()[0]
+
+    def page_rows(conn):
+        if fmt == 'columnar':
+            return _columnar(conn.execute(f'SELECT {alias}.* {from_where} {paging}', page_params))
+        sql = f'SELECT {alias}.*, c.name as customer_name {from_where} {paging}'
+        return [dict(r) for r in conn.execute(sql, page_params).fetchall()]
+
+    tasks = [count, page_rows] + ([_customer_names] if fmt == 'columnar' else [])
+    total, rows, *names = read_executor.run(*tasks)
+
+    result = {
+        'section': section,
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'sort': sort,
+        'order': order
+    }
+    if fmt == 'columnar':
+        page_ids = set(rows['values'][rows['columns'].index('customer_id')])
+        result.update(format='columnar', rows=rows,
+                      customers={cid: name for cid, name in names[0].items() if cid in page_ids})
+    else:
+        result['rows'] = rows
+    return result
+
+def customer_balances(sort='balance', order='desc', page=1, per_page=DEFAULT_PER_PAGE, top=None):
+    """
+    Balance, total value and crate balance of every customer over all dates,
+    sorted by one of BALANCE_SORT_COLUMNS. With top set, returns only the
+    first `top` customers; otherwise one page plus the paging totals.
+    """
+    direction = 'DESC' if order == 'desc' else 'ASC'
+    limit, offset = (top, 0) if top else (per_page, (page - 1) * per_page)
+    # Paged lists also need the number of customers; top-N skips it
+    count = '' if top else ', COUNT(*) OVER () AS total_count'
+
+    def query(conn):
+        # Each table is summed per customer once, then joined to the customers it belongs to.
+        # A sequential scan sums a whole table about twice as fast as walking the customer_id
+        # index, which needs a row lookup per entry, hence NOT INDEXED.
+        rows = [dict(r) for r in conn.execute(f'''
+            SELECT c.id AS customer_id, c.name AS customer_name, c.type AS customer_type,
+                   COALESCE(w.total_weight, 0) AS total_weight,
+                   COALESCE(w.total_value, 0) AS total_value,
+                   COALESCE(f.total_received, 0) AS total_received,
+                   COALESCE(f.total_paid, 0) AS total_paid,
+                   COALESCE(w.total_value, 0) + COALESCE(f.total_received, 0) - COALESCE(f.total_paid, 0) AS balance,
+                   COALESCE(cr.crates_out, 0) AS crates_out,
+                   COALESCE(cr.crates_returned, 0) AS crates_returned,
+                   COALESCE(cr.crates_out, 0) - COALESCE(cr.crates_returned, 0) AS crates_balance{count}
+            FROM customers c
+            LEFT JOIN (SELECT customer_id, SUM(net_weight) AS total_weight, SUM(total) AS total_value
+                       FROM weighbridge NOT INDEXED GROUP BY customer_id) w ON w.customer_id = c.id
+            LEFT JOIN (SELECT customer_id, SUM(amount_received) AS total_received, SUM(amount_paid) AS total_paid
+                       FROM finance NOT INDEXED GROUP BY customer_id) f ON f.customer_id = c.id
+            LEFT JOIN (SELECT customer_id, SUM(crates_out) AS crates_out, SUM(crates_returned) AS crates_returned
+                       FROM crates NOT INDEXED GROUP BY customer_id) cr ON cr.customer_id = c.id
+            ORDER BY {sort} {direction}, c.name ASC, c.id ASC
+            LIMIT ? OFFSET ?
+        ''', (limit, offset)).fetchall()]
+        if top:
+            return rows, None
+        if rows:
+            total = rows[0]['total_count']
+        else:
+            # Past the last page there is no row to carry the window count
+            total = conn.execute('SELECT COUNT(*) FROM customers').fetchone()[0]
+        return rows, total
+
+    (rows, total), = read_executor.run(query)
+    for rank, row in enumerate(rows, start=offset + 1):
+        row.pop('total_count', None)
+        row['rank'] = rank
+
+    result = {'sort': sort, 'order': order, 'customers': rows}
+    if top:
+        result['top'] = top
+    else:
+        result.update(page=page, per_page=per_page, total=total, pages=(total + per_page - 1) // per_page)
+    return result
@@ -5,9 +5,11 @@ Handles password hashing, input validation, and security functions
 from werkzeug.security import generate_password_hash, check_password_hash
 import re
 import html
-import json
 import os
 from datetime import datetime, timedelta
+import logging
+
+security_logger = logging.getLogger('security')
 
 class SecurityUtils:
     """Security utility functions"""
@@ -211,21 +213,19 @@ class SecurityUtils:
     @staticmethod
     def log_security_event(event_type, details, user_id=None):
         """
-        Log security events (implementation can be expanded)
-        For now, just print to console - in production, send to proper logging system
+        Log security events to the log file and, in batches, the audit_log table
         """
+        from flask import has_request_context, request
+
         timestamp = datetime.now().isoformat()
         log_entry = {
             'timestamp': timestamp,
             'event_type': event_type,
             'user_id': user_id,
             'details': details,
-            'ip_address': 'unknown'  # Can be enhanced to capture actual IP
+            'ip_address': request.remote_addr if has_request_context() else 'unknown'
         }
         
-        print(f"SECURITY LOG: {json.dumps(log_entry, ensure_ascii=False)}")
-        
-        # In production, you might want to:
-        # - Send to dedicated logging service
-        # - Store in secure log database
-        # - Alert administrators for critical events
\ No newline at end of file
+        # The entry travels as a dict in extra=; the message stays plain text
+        security_logger.info("SECURITY LOG: %s (user %s, %s): %s", event_type, user_id, log_entry['ip_address'], details,
+                             extra={'audit': log_entry})
\ No newline at end of file
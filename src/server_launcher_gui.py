@@ -8,6 +8,9 @@ import subprocess
 import threading
 import time
 import socket
+import json
+import urllib.request
+import urllib.error
 import webbrowser
 from pathlib import Path
 
@@ -21,6 +24,13 @@ except ImportError:
     import tkinter as tk
     from tkinter import ttk, messagebox
 
+SERVER_PORT = 5000
+READY_URL = f"http://127.0.0.1:{SERVER_PORT}/readyz"
+READY_TIMEOUT = 60
+STATUS_INTERVAL = 2
+LOG_POLL_MS = 200
+LOG_PANEL_LINES = 1000
+
 class ServerLauncherGUI:
     def __init__(self, root):
         self.root = root
@@ -39,7 +49,11 @@ class ServerLauncherGUI:
 
         # Server process management
         self.server_process = None
+        self.log_pump = None
+        self.log_seq = 0
         self.is_server_running = False
+        self.is_starting = False
+        self.server_health = None
 
         # Color scheme
         self.bg_color = "#1a1a2e"
@@ -53,11 +67,12 @@ class ServerLauncherGUI:
         self.root.configure(bg=self.bg_color)
 
         self.setup_ui()
-        self.check_server_status()
+        threading.Thread(target=self.check_server_status, daemon=True).start()
 
         # Start status monitoring
         self.monitor_thread = threading.Thread(target=self.monitor_server_status, daemon=True)
         self.monitor_thread.start()
+        self.root.after(LOG_POLL_MS, self.poll_server_logs)
 
     def setup_ui(self):
         """Setup the user interface"""
@@ -260,6 +275,29 @@ class ServerLauncherGUI:
         )
         self.mobile_label.pack(side=tk.RIGHT)
 
+        # Uptime reported by the server
+        uptime_frame = tk.Frame(status_grid, bg=self.secondary_bg)
+        uptime_frame.pack(fill=tk.X, pady=5)
+
+        tk.Label(
+            uptime_frame,
+            text="مدة التشغيل:",
+            font=("Segoe UI", 12),
+            bg=self.secondary_bg,
+            fg=self.text_color,
+            anchor="w"
+        ).pack(side=tk.LEFT)
+
+        self.uptime_label = tk.Label(
+            uptime_frame,
+            text="-",
+            font=("Segoe UI", 12),
+            bg=self.secondary_bg,
+            fg=self.text_color,
+            anchor="w"
+        )
+        self.uptime_label.pack(side=tk.RIGHT)
+
     def setup_logs_panel(self, parent):
         """Setup the logs panel"""
         # Title
@@ -309,12 +347,48 @@ class ServerLauncherGUI:
 
     def log_message(self, message):
         """Add a message to the logs"""
-        self.logs_text.config(state=tk.NORMAL)
         timestamp = time.strftime("%H:%M:%S")
-        self.logs_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        self.append_logs([f"[{timestamp}] {message}"])
+
+    def append_logs(self, lines):
+        """Append lines to the log panel, keeping at most LOG_PANEL_LINES"""
+        self.logs_text.config(state=tk.NORMAL)
+        self.logs_text.insert(tk.END, "\n".join(lines) + "\n")
+        line_count = int(self.logs_text.index('end-1c').split('.')[0])
+        if line_count > LOG_PANEL_LINES:
+            self.logs_text.delete('1.0', f'{line_count - LOG_PANEL_LINES + 1}.0')
         self.logs_text.see(tk.END)
         self.logs_text.config(state=tk.DISABLED)
 
+    def poll_server_logs(self):
+        """Show new server output from the log pump, then poll again"""
+        try:
+            if self.log_pump:
+                lines, self.log_seq, dropped = self.log_pump.read_since(self.log_seq)
+                text = [f"... تم تخطي {dropped} سطر ..."] if dropped else []
+                text += [f"! {line}" if stream == 'stderr' else line for _, stream, line in lines]
+                if text:
+                    self.append_logs(text)
+        finally:
+            self.root.after(LOG_POLL_MS, self.poll_server_logs)
+
+    def start_log_pump(self, process):
+        """Drain the server's output pipes in background threads"""
+        from log_pump import LogPump
+        from config import config, ensure_dir
+
+        log_path = None
+        if config.SERVER_LOG_FILE_ENABLED:
+            try:
+                log_path = os.path.join(ensure_dir(config.DATA_DIR), 'server_output.log')
+            except OSError as e:
+                self.log_message(f"تعذر إنشاء ملف سجل الخادم: {e}")
+        if self.log_pump:
+            self.log_pump.close()
+        self.log_seq = 0
+        self.log_pump = LogPump(process, log_path=log_path, max_bytes=config.SERVER_LOG_MAX_BYTES,
+                                backup_count=config.SERVER_LOG_BACKUPS).start()
+
     def get_local_ip(self):
         """Get local IP address"""
         try:
@@ -332,26 +406,85 @@ class ServerLauncherGUI:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             return s.connect_ex(('127.0.0.1', port)) == 0
 
+    def fetch_health(self, timeout=1):
+        """Ask the server for its readiness report; None when nothing answers it"""
+        try:
+            with urllib.request.urlopen(READY_URL, timeout=timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            # 503 still carries the report with the failing checks
+            if e.code == 503:
+                try:
+                    return json.loads(e.read().decode('utf-8'))
+                except ValueError:
+                    return None
+            return None
+        except (urllib.error.URLError, OSError, ValueError):
+            return None
+
     def check_server_status(self):
-        """Check current server status"""
-        self.is_server_running = self.is_port_in_use(5000)
-        self.update_ui_status()
+        """Check current server status (call from a background thread)"""
+        self.server_health = self.fetch_health()
+        # Something else may hold the port without answering /readyz
+        self.is_server_running = self.server_health is not None or self.is_port_in_use(SERVER_PORT)
+        self.root.after(0, self.update_ui_status)
 
     def monitor_server_status(self):
-        """Monitor server status in background"""
+        """Monitor server status and uptime in background"""
         while True:
-            old_status = self.is_server_running
-            self.is_server_running = self.is_port_in_use(5000)
-
-            if old_status != self.is_server_running:
-                self.root.after(0, self.update_ui_status)
+            time.sleep(STATUS_INTERVAL)
+            if not self.is_starting:
+                self.check_server_status()
+
+    def wait_until_ready(self, process):
+        """Poll /readyz with backoff until the server is ready, exits or times out"""
+        delay = 0.1
+        deadline = time.time() + READY_TIMEOUT
+        try:
+            while time.time() < deadline:
+                if process.poll() is not None:
+                    self.root.after(0, self.log_message, f"توقف الخادم أثناء التشغيل (رمز الخروج {process.returncode})")
+                    return
+                health = self.fetch_health(timeout=2)
+                if health and health.get('status') == 'ready':
+                    self.root.after(0, self.log_message, f"الخادم يعمل الآن وجاهز! (الإصدار {health.get('version')})")
+                    self.root.after(0, self.log_message, "يمكنك الآن فتح التطبيق في المتصفح.")
+                    return
+                if health:
+                    failing = [f"{name}: {value}" for name, value in health.get('checks', {}).items() if value != 'ok']
+                    self.root.after(0, self.log_message, "الخادم غير جاهز بعد: " + "، ".join(failing))
+                time.sleep(delay)
+                delay = min(delay * 2, 2)
+            self.root.after(0, self.log_message, "تحذير: لم يصبح الخادم جاهزاً خلال المهلة المحددة")
+        finally:
+            self.is_starting = False
+            self.check_server_status()
 
-            time.sleep(2)
+    def format_uptime(self, seconds):
+        seconds = int(seconds)
+        days, seconds = divmod(seconds, 86400)
+        hours, seconds = divmod(seconds, 3600)
+        minutes, seconds = divmod(seconds, 60)
+        text = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        return f"{days} يوم {text}" if days else text
 
     def update_ui_status(self):
         """Update UI based on server status"""
-        if self.is_server_running:
-            self.status_label.config(text="✅ يعمل", fg=self.success_color)
+        health = self.server_health
+        if self.is_starting and not self.is_server_running:
+            self.status_label.config(text="⏳ جاري التشغيل...", fg=self.warning_color)
+            self.start_btn.config(state=tk.DISABLED, bg=self.secondary_bg, fg=self.text_color)
+            self.stop_btn.config(state=tk.DISABLED)
+            self.access_btn.config(state=tk.DISABLED)
+            self.uptime_label.config(text="-")
+        elif self.is_server_running:
+            if health and health.get('status') == 'ready':
+                self.status_label.config(text="✅ يعمل", fg=self.success_color)
+            elif health:
+                self.status_label.config(text="⏳ غير جاهز", fg=self.warning_color)
+            else:
+                self.status_label.config(text=f"⚠️ المنفذ {SERVER_PORT} مشغول ببرنامج آخر", fg=self.warning_color)
+            self.uptime_label.config(text=self.format_uptime(health['uptime_seconds']) if health else "-")
             self.start_btn.config(state=tk.DISABLED, bg=self.secondary_bg, fg=self.text_color)
             self.stop_btn.config(state=tk.NORMAL)
             self.access_btn.config(state=tk.NORMAL)
@@ -365,6 +498,7 @@ class ServerLauncherGUI:
             self.stop_btn.config(state=tk.DISABLED)
             self.access_btn.config(state=tk.DISABLED)
             self.mobile_label.config(text="http://<IP>:5000", fg=self.warning_color)
+            self.uptime_label.config(text="-")
 
     def start_server(self):
         """Start the Flask server"""
@@ -389,28 +523,25 @@ class ServerLauncherGUI:
                 cmd = [sys.executable, server_path]
                 cwd = os.path.dirname(server_path)
 
-            # Start server process
+            # Start server process; unbuffered UTF-8 output so the log pump sees lines as they are printed
+            env = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
             self.server_process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 cwd=cwd,
+                env=env,
                 creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
             )
+            self.start_log_pump(self.server_process)
 
             self.log_message("تم بدء عملية الخادم بنجاح")
             self.log_message("جاري انتظار تهيئة الخادم...")
 
-            # Wait a moment for server to start
-            time.sleep(3)
-            self.check_server_status()
-
-            if self.is_server_running:
-                self.log_message("الخادم يعمل الآن وجاهز!")
-                self.log_message("يمكنك الآن فتح التطبيق في المتصفح.")
-            else:
-                self.log_message("تحذير: ربما لم يبدأ الخادم بشكل صحيح")
-                # Don't kill process yet, give it more time
+            # Wait for /readyz in the background so the window stays responsive
+            self.is_starting = True
+            self.update_ui_status()
+            threading.Thread(target=self.wait_until_ready, args=(self.server_process,), daemon=True).start()
 
         except Exception as e:
             self.log_message(f"خطأ في تشغيل الخادم: {str(e)}")
@@ -464,8 +595,7 @@ class ServerLauncherGUI:
             self.log_message("تم إيقاف الخادم بنجاح")
 
             # Update status
-            time.sleep(1)
-            self.check_server_status()
+            threading.Thread(target=self.check_server_status, daemon=True).start()
 
         except Exception as e:
             self.log_message(f"خطأ في إيقاف الخادم: {str(e)}")
@@ -513,8 +643,8 @@ def main():
             app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
         except Exception as e:
             # If something goes wrong, write to a log file in AppData
-            from config import config
-            log_path = os.path.join(config.DATA_DIR, 'server_error.log')
+            from config import config, ensure_dir
+            log_path = os.path.join(ensure_dir(config.DATA_DIR), 'server_error.log')
             with open(log_path, 'w') as f:
                 f.write(str(e))
         return
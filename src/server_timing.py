@@ -0,0 +1,57 @@
+"""
+Server-Timing instrumentation for Date Factory Manager
+Collects per-request phase durations (license, auth, db, render, serialize)
+and reports them in the Server-Timing response header for browser devtools
+"""
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, before_render_template, template_rendered
+from flask.json.provider import DefaultJSONProvider
+
+def add(phase, elapsed_ms):
+    """Add time to a phase of the current request"""
+    if not has_request_context():
+        return
+    timings = g.setdefault('server_timing', {})
+    timings[phase] = timings.get(phase, 0.0) + elapsed_ms
+
+@contextmanager
+def measure(phase):
+    """Time a block as part of a phase of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(phase, (time.perf_counter() - started) * 1000)
+
+def header_value(total_ms, db_count, db_ms):
+    """Build the Server-Timing header for the current request"""
+    timings = g.get('server_timing', {})
+    parts = [f'{phase};dur={elapsed_ms:.1f}' for phase, elapsed_ms in timings.items()]
+    parts.append(f'db;dur={db_ms:.1f};desc="{db_count} queries"')
+    parts.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(parts)
+
+
+class TimingJSONProvider(DefaultJSONProvider):
+    """JSON provider that reports serialization time as the serialize phase"""
+
+    def dumps(self, obj, **kwargs):
+        with measure('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+def _template_started(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+def _template_finished(sender, template, context, **extra):
+    started = g.pop('render_started', None)
+    if started is not None:
+        add('render', (time.perf_counter() - started) * 1000)
+
+def init_app(app):
+    """Install the render and serialize hooks on the Flask app"""
+    app.json = TimingJSONProvider(app)
+    before_render_template.connect(_template_started, app)
+    template_rendered.connect(_template_finished, app)
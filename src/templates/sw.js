@@ -0,0 +1,101 @@
+// Service worker for Date Factory Manager (served from /sw.js)
+// Static assets (stylesheet, scripts, icons) are cache-first. App pages and
+// customer/price data embed rows another PC may have just changed, so they
+// are network-first: the cached copy is only served when the server cannot be
+// reached. Caches are named after the app version, so a new release drops the
+// old ones.
+const VERSION = {{ version|tojson }};
+const STATIC_CACHE = `dfm-static-${VERSION}`;
+const RUNTIME_CACHE = `dfm-runtime-${VERSION}`;
+
+const PRECACHE = {{ precache|tojson }};
+const SHELL_PAGES = {{ shell_pages|tojson }};
+const DATA_PATHS = {{ data_paths|tojson }};
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(cache => cache.addAll(PRECACHE))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys
+                .filter(key => key.startsWith('dfm-') && key !== STATIC_CACHE && key !== RUNTIME_CACHE)
+                .map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (request.method !== 'GET') {
+        event.respondWith(forwardWrite(request));
+    } else if (url.pathname === '/logout') {
+        event.respondWith(clearRuntime().then(() => fetch(request)));
+    } else if (url.pathname.startsWith('/static/')) {
+        event.respondWith(cacheFirst(request));
+    } else if ((request.mode === 'navigate' && SHELL_PAGES.includes(url.pathname))
+               || DATA_PATHS.includes(url.pathname)) {
+        event.respondWith(networkFirst(request));
+    }
+});
+
+// Pages embed rows and the pages reload after saving, so any successful write
+// drops cached pages and data before the response reaches the page
+async function forwardWrite(request) {
+    const response = await fetch(request);
+    if (response.ok) {
+        await clearRuntime();
+    }
+    return response;
+}
+
+function clearRuntime() {
+    return caches.delete(RUNTIME_CACHE);
+}
+
+async function cacheFirst(request) {
+    const cache = await caches.open(STATIC_CACHE);
+    const cached = await cache.match(request);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function networkFirst(request) {
+    const cache = await caches.open(RUNTIME_CACHE);
+    let response;
+    try {
+        response = await fetch(request);
+    } catch (error) {
+        // Offline: fall back to the last copy we saw
+        const cached = await cache.match(request);
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+
+    if (response.ok && !response.redirected) {
+        await cache.put(request, response.clone());
+    } else if (response.type === 'opaqueredirect' || response.redirected
+               || response.status === 401 || response.status === 403) {
+        // Logged out or license expired: never serve this entry again
+        await cache.delete(request);
+    }
+    return response;
+}
@@ -0,0 +1,4 @@
+"""
+Unit tests for Date Factory Manager
+Run with: python -m pytest tests -q
+"""
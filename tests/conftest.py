@@ -0,0 +1,10 @@
+"""
+Shared test setup: modules under src/ are imported the way app.py imports
+them, by name
+"""
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,52 @@
+"""
+Tests for database.bulk_write: one version bump per bulk write, and a failed
+bulk write leaves the triggers and the counters as they were.
+"""
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', str(tmp_path / 'test.db'))
+    database.init_db()
+    conn = database.get_connection()
+    yield conn
+    conn.close()
+
+def version(conn, table):
+    return database.get_table_versions(conn, [table])[table]
+
+def triggers(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+
+
+def test_single_writes_bump_once_per_row(db):
+    db.executemany('INSERT INTO customers (name, type) VALUES (?, ?)', [('a', 't'), ('b', 't')])
+    db.commit()
+    assert version(db, 'customers') == 2
+
+def test_bulk_write_bumps_once(db):
+    with database.bulk_write(db, 'customers'):
+        db.executemany('INSERT INTO customers (name, type) VALUES (?, ?)', [(f'c{i}', 't') for i in range(50)])
+    db.commit()
+    assert version(db, 'customers') == 1
+    assert set(database.VERSION_TRIGGERS) <= triggers(db)
+
+def test_failed_bulk_write_rolls_back(db):
+    with pytest.raises(RuntimeError):
+        with database.bulk_write(db, 'customers'):
+            db.execute("INSERT INTO customers (name, type) VALUES ('a', 't')")
+            raise RuntimeError('import failed')
+    assert not db.in_transaction
+    assert db.execute('SELECT COUNT(*) FROM customers').fetchone()[0] == 0
+    assert set(database.VERSION_TRIGGERS) <= triggers(db)
+    # The write lock is released: another connection can write
+    other = database.get_connection()
+    try:
+        other.execute("INSERT INTO customers (name, type) VALUES ('b', 't')")
+        other.commit()
+    finally:
+        other.close()
+    assert version(db, 'customers') == 1
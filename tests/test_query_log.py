@@ -0,0 +1,54 @@
+"""
+Tests for the slow-query log: statements must be recorded however their rows
+are read, and the per-statement table must stay bounded.
+"""
+import sqlite3
+
+import query_log
+
+
+def timed_connection():
+    """In-memory connection with three rows in t"""
+    conn = sqlite3.connect(':memory:', factory=query_log.TimedConnection)
+    conn.execute('CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)')
+    conn.executemany('INSERT INTO t (name) VALUES (?)', [('a',), ('b',), ('c',)])
+    return conn
+
+def recorded(sql):
+    """Statistics entry of a statement, or None"""
+    return next((e for e in query_log.top_queries(limit=None) if e['sql'] == sql), None)
+
+
+def test_iterating_a_cursor_records_the_statement():
+    conn = timed_connection()
+    query_log.reset()
+    query_log.begin_request()
+    try:
+        names = [row[1] for row in conn.execute('SELECT * FROM t ORDER BY id')]
+        count, _ = query_log.request_totals()
+    finally:
+        query_log.end_request()
+        conn.close()
+
+    assert names == ['a', 'b', 'c']
+    entry = recorded('SELECT * FROM t ORDER BY id')
+    assert entry is not None and entry['count'] == 1
+    assert count == 1
+
+def test_fetchall_and_iteration_are_recorded_alike():
+    conn = timed_connection()
+    query_log.reset()
+    conn.execute('SELECT name FROM t').fetchall()
+    list(conn.execute('SELECT name FROM t'))
+    conn.close()
+
+    assert recorded('SELECT name FROM t')['count'] == 2
+
+def test_statistics_are_bounded():
+    conn = timed_connection()
+    query_log.reset()
+    for i in range(query_log.STATS_SIZE + 20):
+        conn.execute(f'SELECT {i} FROM t').fetchall()
+    conn.close()
+
+    assert len(query_log.top_queries(limit=None)) == query_log.STATS_SIZE